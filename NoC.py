@@ -12,41 +12,71 @@
 from direct.showbase.ShowBase import ShowBase
 from direct.showbase.DirectObject import DirectObject
 from panda3d.core import *
-from panda3d.core import (WindowProperties, CollisionNode, GeomNode, CollisionRay)
+from panda3d.core import WindowProperties
 from direct.interval.IntervalGlobal import *
 from direct.gui.DirectGui import *
 
+import builtins
 import sys
+import time
 import random
-import math
-import buildingsDB
+import os
+import savegame
 
+from assets import AssetRegistry
+from bindings import Bindings
 from cameraController import CameraController
+from catalog import load_catalog
+from commandlog import CommandLog
+from economy import Economy
+from gameclock import GameClock
+from launchwindows import LaunchWindows
+from missions import MissionScheduler
+from ledger import Ledger
 from planetInfoView import PlanetInfoView
 from planetBuildView import PlanetBuildView
 from star import Star
 from planet import Planet
 from moon import Moon
-
-base = ShowBase()
-wp = WindowProperties()
-wp.setSize(1080, 600)
-base.win.requestProperties(wp)
+from orbits import Orbits
+from picking import Picker
+from production import ProductionSolver
+from profiler import Profiler, ProfilerOverlay
+from scheduler import FrameScheduler
+from spatial import SpatialIndex
 
 
 class World(DirectObject):
 
-    def __init__(self):
-
-        # The standard camera, light and background initialization
-        base.setBackgroundColor(0, 0, 0)
-        base.disableMouse()
-        self.cam_ctrl = CameraController()
-        self.cam_ctrl.reset()
-        alight = AmbientLight('alight')
-        alight.setColor((0.2, 0.2, 0.2, 1))
-        alnp = render.attachNewNode(alight)
-        render.setLight(alnp)
+    def __init__(self, headless=False, seed=None, threaded=False):
+        # A headless world has no window, no GUI and no intervals. Time only
+        # moves forward through step() and simulate(). A threaded world runs
+        # its simulation steps in a worker thread besides the frames.
+        self.headless = headless
+        self.startup_start = time.perf_counter()
+        self.startup_timings = {}
+
+        # All randomness of the game comes from this generator, so a world can
+        # be rebuilt exactly from its seed and command log
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.command_log = CommandLog(seed)
+        self.save_marks = {}    # Save file path -> what it holds, see savegame
+
+        if not hasattr(builtins, 'base'):
+            ShowBase(windowType='none' if headless else None)
+
+        # Times every task of the game, see the overlay on F3
+        self.profiler = Profiler()
+        if not headless:
+            self.profiler.install()
+        if isinstance(base.win, GraphicsWindow):
+            wp = WindowProperties()
+            wp.setSize(1080, 600)
+            base.win.requestProperties(wp)
+        self.mark_startup('window')
 
         # The global variables we use to control the speed and size of objects
         self.yearscale = 900
@@ -54,7 +84,6 @@ class World(DirectObject):
         self.yearCounter = 0
         self.dayCounter = 0
         self.money = 2000
-        self.system_population = 0
         self.orbitscale = 10
         self.sizescale = 0.6
 
@@ -69,38 +98,80 @@ class World(DirectObject):
         self.capitalPlanet = None
 
         self.galaxy_objects = []
-        self.BuildingsDB = {}  # Will contain all buildable structures
-
-        # Everything that's needed to detect selecting objects with mouse
-        self.pickerNode = CollisionNode('mouseRay')
-        self.pickerNP = camera.attachNewNode(self.pickerNode)
-        self.pickerNode.setFromCollideMask(GeomNode.getDefaultCollideMask())
-        self.pickerRay = CollisionRay()
-        self.pickerNode.addSolid(self.pickerRay)
-        self.collQueue = CollisionHandlerQueue()
-        base.cTrav = CollisionTraverser('myTraverser')
-        base.cTrav.addCollider(self.pickerNP, self.collQueue)
-
-        # Set up the start screen
-        self.create_gui()
-        self.NewPlanetInfoView = PlanetInfoView(self)
-        self.NewPlanetBuildView = PlanetBuildView(self)
+        self.assets = AssetRegistry()
+        self.catalog = load_catalog()  # Contains all buildable structures
+        self.production = ProductionSolver(self.catalog)
+        self.ledger = Ledger(self)
+        self.check_ledger = False   # Recount the ledger after every step
+        self.economy = Economy(self)
+
+        self.sim_time = 0
+        self.clock = GameClock(self)
+        self.missions = MissionScheduler(self)
+
+        self.NewPlanetInfoView = None
+        self.NewPlanetBuildView = None
+
+        if not headless:
+            # The standard camera, light and background initialization
+            base.setBackgroundColor(0, 0, 0)
+            base.disableMouse()
+            self.cam_ctrl = CameraController()
+            self.cam_ctrl.reset()
+            alight = AmbientLight('alight')
+            alight.setColor((0.2, 0.2, 0.2, 1))
+            alnp = render.attachNewNode(alight)
+            render.setLight(alnp)
 
-        self.load_planets()
-        self.rotate_planets()
-        self.BuildingsDB = buildingsDB.loadDB()
-        self.set_capital_planet()
+            # Periodic GUI work shares a time budget per frame
+            self.scheduler = FrameScheduler(profiler=self.profiler)
+            self.scheduler.start()
+
+            # Labels that show game values get refreshed when they change
+            self.hud_bindings = Bindings(self.scheduler, 'hudBindings', priority=0)
 
-        # Add all constantly running checks to the taskmanager
-        taskMgr.add(self.redraw_head_gui, "redrawHeadGUITask")
-        taskMgr.doMethodLater(
-            self.population_time_delta, self.populate_planet_task, 'populatePlanetTask',
-            extraArgs=[self.Earth], appendTask=True)
-        taskMgr.doMethodLater(2, self.generate_money_task, 'generateMoneyTask')
+            # Detects the body under the mouse for selecting and hovering
+            self.picker = Picker(self)
+            self.hovered = None
 
-        # Open up all listeners for varous mouse and keyboard inputs
-        self.accept("escape", sys.exit)
-        self.accept('mouse1', self.handle_mouse_click)
+            # Set up the start screen
+            self.create_gui()
+            self.NewPlanetInfoView = PlanetInfoView(self)
+            self.NewPlanetBuildView = PlanetBuildView(self)
+            self.profiler_overlay = ProfilerOverlay(self.profiler, self.scheduler)
+            self.mark_startup('gui')
+
+        self.load_planets()
+        self.load_orbits()
+        self.set_capital_planet()
+        self.mark_startup('world')
+
+        if not headless:
+            self.orbits.update(self.orbit_time())
+            taskMgr.add(self.orbit_task, 'orbitTask')
+            taskMgr.add(self.hover_task, 'hoverTask')
+
+            # Models and textures of the bodies stream in over the first frames,
+            # the blueprint images only get cached for the build view afterwards
+            for blueprint in self.catalog:
+                self.assets.request_texture(blueprint.img, priority=2)
+            self.assets.start_streaming()
+            taskMgr.add(self.startup_task, 'startupTask', sort=60)
+
+            # Add all constantly running checks to the taskmanager
+            self.clock.start(threaded)
+            self.hud_bindings.bind(
+                self.HeadGUIText,
+                self.hud_values, 'Year {}, Day {}, Money: {}, Population: {}'.format)
+
+            # Open up all listeners for varous mouse and keyboard inputs
+            self.accept("escape", sys.exit)
+            self.accept('mouse1', self.handle_mouse_click)
+            self.accept('space', self.clock.toggle_pause)
+            self.accept('f3', self.profiler_overlay.toggle)
+            self.accept('f4', self.export_profile, ['profile'])
+            for key, speed in zip(('1', '2', '3'), self.clock.SPEEDS):
+                self.accept(key, self.clock.set_speed, [speed])
 
     # ****************************************
     #         Main Gameplay Functions        *
@@ -110,33 +181,94 @@ class World(DirectObject):
     # ----------------------------------------
 
     def handle_mouse_click(self):
-        if base.mouseWatcherNode.hasMouse():
+        instance = self.picker.pick_mouse()
+        if instance is not None and not self.PlanetInfoModeOn:
+            self.toggle_planet_info_mode(True, instance)
+
+    def hover_task(self, task):
+        # Shows the name of the body under the mouse next to the cursor
+        instance = None
+        if not self.PlanetInfoModeOn:
+            instance = self.picker.pick_mouse()
+
+        if instance is None:
+            if self.hovered is not None:
+                self.HoverTooltip.hide()
+        else:
             mpos = base.mouseWatcherNode.getMouse()
-            self.pickerRay.setFromLens(base.camNode, mpos.getX(), mpos.getY())
-            base.cTrav.traverse(render)
-            if self.collQueue.getNumEntries() > 0:
-                self.collQueue.sortEntries()
-                pickedObj = self.collQueue.getEntry(0).getIntoNodePath()
-                pickedObj = pickedObj.findNetTag('clickable')
-                if not pickedObj.isEmpty() and not self.PlanetInfoModeOn:
-                    instance = pickedObj.getPythonTag('instance')
-                    self.toggle_planet_info_mode(True, instance)
-
-    def redraw_head_gui(self, task):
-        self.HeadGUIText['text'] = ('Year ' + str(self.yearCounter) + ', '
-                                    'Day ' + str(self.dayCounter) + ', '
-                                    'Money: ' + str(self.money) + ', '
-                                    'Population: ' + str(self.system_population))
+            self.HoverTooltip.setPos(mpos.getX() * base.getAspectRatio() + 0.05, 0,
+                                     mpos.getY() - 0.05)
+            if instance is not self.hovered:
+                self.HoverTooltip['text'] = instance.name
+                self.HoverTooltip.show()
+        self.hovered = instance
         return task.cont
 
-    # Smaller single line functions
-    # -----------------------------
-
-    def incYear(self):
-        self.yearCounter += 1
-
-    def incDay(self):
-        self.dayCounter += 1
+    # Startup
+    # -------
+
+    def mark_startup(self, phase):
+        # Seconds since the world started to get created
+        self.startup_timings[phase] = time.perf_counter() - self.startup_start
+
+    def startup_task(self, task):
+        # Runs after the frame got rendered, so the first call marks the time
+        # to the first frame. Afterwards it shows the progress of the streaming.
+        if 'first_frame' not in self.startup_timings:
+            self.mark_startup('first_frame')
+
+        progress = self.assets.progress()
+        self.LoadingBar['value'] = progress * 100
+        if progress < 1:
+            return task.cont
+
+        self.LoadingBar.hide()
+        self.mark_startup('assets')
+        return task.done
+
+    # Simulation clock
+    # ----------------
+
+    def step(self):
+        # Advances the whole game by one second of game time. Everything that
+        # changes the game state over time gets called from here.
+        self.sim_time += 1
+        self.yearCounter = int(self.sim_time // self.yearscale)
+        self.dayCounter = int(self.sim_time // self.dayscale)
+
+        self.missions.advance(self.sim_time)
+        if self.sim_time % self.population_time_delta == 0:
+            for obj in self.galaxy_objects:
+                if type(obj) != Star and obj.colonised:
+                    self.populate_planet(obj)
+        if self.sim_time % 2 == 0:
+            self.generate_money()
+        if self.sim_time % self.economy.tick_delay == 0:
+            self.economy.tick()
+        if self.check_ledger:
+            self.ledger.check()
+        self.clock.fire_timers()
+
+    def advance(self, steps):
+        # Runs the steps the game clock caught up with in one batch
+        for _ in range(steps):
+            self.step()
+
+    def simulate(self, days=1):
+        # Fast forwards the game by the given amount of days as fast as possible
+        # and reports the reached throughput.
+        steps = int(round(days * self.dayscale))
+        start = time.perf_counter()
+        for _ in range(steps):
+            self.step()
+        duration = time.perf_counter() - start
+
+        return {
+            'days': days,
+            'steps': steps,
+            'seconds': duration,
+            'days_per_second': days / duration if duration > 0 else float('inf')
+        }
 
     # Functions to interact with the planet info view
     # ------------------------------------------------
@@ -157,20 +289,21 @@ class World(DirectObject):
         else:
             self.PlanetInfoModeOn = False
             self.cam_ctrl.reset()
-            taskMgr.remove('updatePlanetInfoTask')
+            self.scheduler.remove('updatePlanetInfo')
             self.NewPlanetInfoView.hide()
 
     # Global general purpose functions and tasks
     # ---------------------------------------------------
 
-    def populate_planet_task(self, planet, task):
+    def populate_planet(self, planet):
+        self.economy.mark_dirty(planet)
         habProblem = planet.habitation_cap <= planet.population
         foodProblem = (not('Vegetable crates' in planet.goods)
                        or planet.goods['Vegetable crates'] < planet.population)
         nutrition_decrease = round(planet.population * self.food_consuming_factor)
 
         if foodProblem:
-            d = random.randint(-1, 2)
+            d = self.rng.randint(-1, 2)
             if planet.population - d <= 0:
                 planet.population = 0
             else:
@@ -179,36 +312,142 @@ class World(DirectObject):
             pass
             planet.goods['Vegetable crates'] -= nutrition_decrease
         else:
-            planet.population += random.randint(1, 3)
+            planet.population += self.rng.randint(1, 3)
             planet.goods['Vegetable crates'] -= nutrition_decrease
-        return task.again
 
-    def count_system_population(self):
-        wholePop = 0
+    @property
+    def system_population(self):
+        return self.ledger.population
+
+    def hud_values(self):
+        state = self.clock.snapshot
+        return state.year, state.day, state.money, state.population
+
+    def generate_money(self):
+        self.money += self.ledger.income()
+
+    def launch_mission(self, kind, planet, time, cost):
+        # Starts a 'probe' or 'colonise' mission that completes after the given
+        # seconds of game time. Its message counts down until then.
+        if self.money < cost:
+            return 'Not enough Money'
+
+        self.money -= cost
+        self.missions.schedule(kind, planet, time)
+
+    def complete_mission(self, mission):
+        if mission.kind == 'probe':
+            mission.planet.probed = True
+        elif mission.kind == 'colonise':
+            mission.planet.colonised = True
+        self.remove_message(mission.planet, mission.message_id)
+
+    def quote_mission(self, kind, dist):
+        # Duration and costs of a mission over the given distance
+        if kind == 'probe':
+            return round(dist * 2), 500 + round(dist * 67)
+        return round(dist * 4), 3900 + round(dist * 123)
+
+    def plan_mission(self, kind, planet1, planet2, days):
+        # Cheapest launch within the next days as (departure, dist, time, cost)
+        departure, dist = self.launch_windows.cheapest_departure(
+            planet1, planet2, self.orbit_time(), days * self.dayscale)
+        dist = round(dist, 3)
+        return (departure, dist) + self.quote_mission(kind, dist)
+
+    # Player commands
+    # ---------------
+
+    def execute(self, command, *args):
+        # Every player action that changes the game state has to go through
+        # here, so it ends up in the command log. Returns None on success,
+        # otherwise the reason why the command was refused.
+        with self.clock.lock:
+            self.command_log.append(self.sim_time, command, args)
+            problem = self.apply_command(command, args)
+        self.clock.publish()
+        return problem
+
+    def apply_command(self, command, args):
+        if command == 'construct':
+            name, section, slot, b_name = args
+            return self.economy.construct_building(self.get_object(name), section, slot, b_name)
+        elif command == 'salvage':
+            name, section, slot = args
+            return self.economy.salvage_building(self.get_object(name), section, slot)
+        elif command == 'mission':
+            kind, name, time, cost = args
+            return self.launch_mission(kind, self.get_object(name), time, cost)
+        elif command == 'cancel_mission':
+            mission = self.missions.get(args[0])
+            if mission is None:
+                return 'No such mission'
+            mission.cancel()
+            return None
+        raise ValueError('Unknown command: {}'.format(command))
+
+    # Saving and loading
+    # ------------------
+
+    def save_game(self, path):
+        savegame.save(self, path)
+
+    def load_game(self, path):
+        with self.clock.lock:
+            savegame.load(self, path)
+        self.clock.publish()
+
+    def enable_autosave(self, path, interval=60):
+        # The first autosave writes the full state, every following one only
+        # appends the planets that changed in the meantime. The autosave of
+        # the session before is kept as path.1 until the next session.
+        self.autosave_path = path
+        if os.path.exists(path):
+            os.replace(path, path + '.1')
+        self.clock.every(interval, self.autosave)
+
+    def autosave(self):
+        if os.path.exists(self.autosave_path):
+            savegame.snapshot(self, self.autosave_path, background=True)
+        else:
+            savegame.save(self, self.autosave_path)
+
+    @classmethod
+    def replay(cls, log, until=None):
+        # Rebuilds the state of a session from its command log in a new
+        # headless world. Without 'until' it stops at the last command.
+        world = cls(headless=True, seed=log.seed)
+        for tick, command, args in log:
+            while world.sim_time < tick:
+                world.step()
+            world.execute(command, *args)
+        while until is not None and world.sim_time < until:
+            world.step()
+        return world
+
+    def get_object(self, name):
         for obj in self.galaxy_objects:
-            if type(obj) != Star:
-                wholePop += obj.population
-        self.system_population = wholePop
-
-    def generate_money_task(self, task):
-        self.count_system_population()
-        self.money += round(self.system_population * self.tax_factor)
-        return task.again
+            if obj.name == name:
+                return obj
+        raise KeyError(name)
 
     def add_message(self, planet, id, mType, text, value):
         planet.messages.update({id: {'type': mType, 'text': text, 'value': value}})
+        self.economy.mark_dirty(planet)
 
     def remove_message(self, planet, id):
         if id in planet.messages:
             planet.messages.pop(id)
+            self.economy.mark_dirty(planet)
+
+    def spatial_index(self):
+        # Same time as the rendered orbits, the index only gets rebuilt on the
+        # first query at a new time
+        self.spatial.update(self.orbit_time())
+        return self.spatial
 
     def calc_distance_between_planets(self, planet1, planet2):
-        pos1 = planet1.getPos()
-        pos2 = planet2.getPos()
-        diffX = abs(pos1[0] - pos2[0])
-        diffY = abs(pos1[1] - pos2[1])
-        dist = math.sqrt(diffX**2 + diffY**2)
-        return dist
+        return self.spatial_index().distance(planet1, planet2)
 
     def create_dialog(self, problemText, form='ok', function=lambda: None, args=[]):
         if form == 'ok':
@@ -234,89 +473,64 @@ class World(DirectObject):
     # ****************************************
 
     def load_planets(self):
-        self.orbit_root_mercury = render.attachNewNode('orbit_root_mercury')
-        self.orbit_root_venus = render.attachNewNode('orbit_root_venus')
-        self.orbit_root_mars = render.attachNewNode('orbit_root_mars')
-        self.orbit_root_earth = render.attachNewNode('orbit_root_earth')
-
-        self.orbit_root_moon = (
-            self.orbit_root_earth.attachNewNode('orbit_root_moon'))
-
-        self.sky = loader.loadModel("models/sky_dome.blend")
-
-        self.sky_tex = loader.loadTexture("models/sky_tex2_cut.jpg")
-        self.sky_tex.setWrapU(Texture.WM_clamp)
-        self.sky.setTexture(self.sky_tex, 1)
-        self.sky.reparentTo(render)
-        self.sky.setScale(300)
-        self.sky.setHpr(270, 0, 0)
+        if not self.headless:
+            self.sky = render.attachNewNode('sky')
+            self.assets.request_model("models/sky_dome.blend", self.sky, priority=1)
+            self.assets.request_texture(
+                "models/sky_tex2_cut.jpg", self.sky, priority=1,
+                callback=lambda texture: texture.setWrapU(Texture.WM_clamp))
+            self.sky.setScale(300)
+            self.sky.setHpr(270, 0, 0)
 
         self.Sun = Star(self, 'Sun', 'models/planet_sphere',
                         'models/sun_1k_tex.jpg', 2)
 
         self.Mercury = Planet(self, 'Mercury', 'models/planet_sphere',
-                              'models/mercury_1k_tex.jpg', self.orbit_root_mercury,
+                              'models/mercury_1k_tex.jpg', render,
                               0.385, 0.38, False, 1, {'Coal': 'Common', 'Iron': 'Common'})
 
         self.Venus = Planet(self, 'Venus', 'models/planet_sphere',
-                            'models/venus_1k_tex.jpg', self.orbit_root_venus,
+                            'models/venus_1k_tex.jpg', render,
                             0.923, 0.72, False, 2, {'Coal': 'Common', 'Uranium': 'Normal'})
 
         self.Mars = Planet(self, 'Mars', 'models/planet_sphere',
-                           'models/mars_1k_tex.jpg', self.orbit_root_mars,
+                           'models/mars_1k_tex.jpg', render,
                            0.512, 1.52, False, 1, {'Gemstone': 'Rare', 'Iron': 'Rare'})
         self.Mars.probed = True
 
         self.Earth = Planet(self, 'Earth', 'models/planet_sphere',
-                            'models/earth_1k_tex.jpg', self.orbit_root_earth,
+                            'models/earth_1k_tex.jpg', render,
                             1, 1, True, 1, {'Iron': 'Normal', 'Coal': 'Common'})
 
-        self.orbit_root_moon.setPos(self.orbitscale, 0, 0)
-
         self.Earth_Moon = Moon(self, 'Moon', 'models/planet_sphere',
-                               'models/moon_1k_tex.jpg', self.orbit_root_moon,
+                               'models/moon_1k_tex.jpg', render,
                                0.1, 0.1, False, 0, {'Cheese': 'Rare', 'Coal': 'Common'})
 
-    def rotate_planets(self):
-        self.day_period_sun = self.Sun.model.hprInterval(20, (360, 0, 0))
-
-        self.orbit_period_mercury = self.orbit_root_mercury.hprInterval(
-            (0.241 * self.yearscale), (360, 0, 0))
-        self.day_period_mercury = self.Mercury.model.hprInterval(
-            (59 * self.dayscale), (360, 0, 0))
-
-        self.orbit_period_venus = self.orbit_root_venus.hprInterval(
-            (0.615 * self.yearscale), (360, 0, 0))
-        self.day_period_venus = self.Venus.model.hprInterval(
-            (243 * self.dayscale), (360, 0, 0))
-
-        self.orbit_period_earth = Sequence(
-            self.orbit_root_earth.hprInterval(self.yearscale, (360, 0, 0)),
-            Func(self.incYear))
-        self.day_period_earth = Sequence(self.Earth.model.hprInterval(
-            self.dayscale, (360, 0, 0)), Func(self.incDay))
-
-        self.orbit_period_moon = self.orbit_root_moon.hprInterval(
-            (.0749 * self.yearscale), (360, 0, 0))
-        self.day_period_moon = self.Earth_Moon.model.hprInterval(
-            (.0749 * self.yearscale), (360, 0, 0))
-
-        self.orbit_period_mars = self.orbit_root_mars.hprInterval(
-            (1.881 * self.yearscale), (360, 0, 0))
-        self.day_period_mars = self.Mars.model.hprInterval(
-            (1.03 * self.dayscale), (360, 0, 0))
-
-        self.day_period_sun.loop()
-        self.orbit_period_mercury.loop()
-        self.day_period_mercury.loop()
-        self.orbit_period_venus.loop()
-        self.day_period_venus.loop()
-        self.orbit_period_earth.loop()
-        self.day_period_earth.loop()
-        self.orbit_period_moon.loop()
-        self.day_period_moon.loop()
-        self.orbit_period_mars.loop()
-        self.day_period_mars.loop()
+    def load_orbits(self):
+        # Orbit and day periods in seconds of game time
+        self.orbits = Orbits()
+        self.orbits.add(self.Sun, day=20)
+        self.orbits.add(self.Mercury, radius=0.38 * self.orbitscale,
+                        period=0.241 * self.yearscale, day=59 * self.dayscale)
+        self.orbits.add(self.Venus, radius=0.72 * self.orbitscale,
+                        period=0.615 * self.yearscale, day=243 * self.dayscale)
+        self.orbits.add(self.Earth, radius=self.orbitscale,
+                        period=self.yearscale, day=self.dayscale)
+        self.orbits.add(self.Earth_Moon, self.Earth, radius=0.1 * self.orbitscale,
+                        period=0.0749 * self.yearscale, day=0.0749 * self.yearscale)
+        self.orbits.add(self.Mars, radius=1.52 * self.orbitscale,
+                        period=1.881 * self.yearscale, day=1.03 * self.dayscale)
+        self.launch_windows = LaunchWindows(self.orbits)
+        self.spatial = SpatialIndex(self.orbits)
+
+    def orbit_time(self):
+        # Game time including the part of the current step that already
+        # passed, so the bodies move smoothly between two simulation steps
+        return self.clock.time
+
+    def orbit_task(self, task):
+        self.orbits.update(self.orbit_time())
+        return task.cont
 
     def set_capital_planet(self):
         self.capitalPlanet = self.Earth
@@ -326,24 +540,27 @@ class World(DirectObject):
         self.Earth.habitation_cap = 100
 
     def create_gui(self):
-        self.buttonModel = loader.loadModel('models/gui/buttons/simple_button_maps.egg')
-        self.buttonMaps = (self.buttonModel.find('**/normal'), self.buttonModel.find('**/active'),
-                           self.buttonModel.find('**/normal'), self.buttonModel.find('**/disabled'))
-
-        self.dialog_model = loader.loadModel('models/gui/panels/infodialogpanel_maps.egg')
-        self.dialog_map = self.dialog_model.find('**/infodialogpanel')
+        self.buttonMaps = self.assets.find_maps('models/gui/buttons/simple_button_maps.egg')
+        self.dialog_map = self.assets.find(
+            'models/gui/panels/infodialogpanel_maps.egg', '**/infodialogpanel')
 
         self.HeadGUIPanel = DirectFrame(
             frameColor=(0.2, 0.2, 0.22, 0.9), frameSize=(0, 1.55, -0.13, 0), pos=(-1.8, 0, 1))
 
+        self.LoadingBar = DirectWaitBar(
+            value=0, pos=(0, 0, -0.9), scale=(0.6, 1, 0.3),
+            frameColor=(0.2, 0.2, 0.22, 0.9), barColor=(0.5, 0.5, 0.5, 1))
+
         self.HeadGUIText = DirectLabel(
-            text=('Year ' + str(self.yearCounter) + ', '
-                  'Day ' + str(self.dayCounter) + ', '
-                  'Money: ' + str(self.money) + ', '
-                  'Population: ' + str(self.system_population)),
+            text='',
             pos=(0.1, 0, -0.085), text_fg=(1, 1, 1, 1), frameColor=(0, 0, 0, 0),
             parent=self.HeadGUIPanel, text_align=TextNode.ALeft, text_scale=.07)
 
+        self.HoverTooltip = DirectLabel(
+            text='', text_fg=(1, 1, 1, 1), text_scale=0.05, text_align=TextNode.ALeft,
+            frameColor=(0.2, 0.2, 0.22, 0.9), pad=(0.02, 0.02))
+        self.HoverTooltip.hide()
+
         self.MapViewPanel = DirectFrame(
             frameColor=(0.2, 0.2, 0.22, 0.9),
             frameSize=(0, 0.5, -1.25, 0),
@@ -395,28 +612,50 @@ class World(DirectObject):
     #        Debug / Testing Functions       *
     # ****************************************
 
+    def export_profile(self, path):
+        # Writes the task timings so far to path.json and path.csv
+        self.profiler.export_json(path + '.json')
+        self.profiler.export_csv(path + '.csv')
+
     def reset_game(self):
-        self.NewPlanetInfoView.hide()
-        self.NewPlanetBuildView.hide()
-        self.PlanetInfoModeOn = False
+        if not self.headless:
+            self.NewPlanetInfoView.hide()
+            self.NewPlanetBuildView.hide()
+            self.PlanetInfoModeOn = False
 
-        taskMgr.remove('quickinfoTask')
-        taskMgr.remove('buildcamTask')
-        taskMgr.remove('infocamTask')
+            self.NewPlanetBuildView.unbind_quickinfo()
+            self.cam_ctrl.reset()
 
-        self.yearCounter = 0
-        self.dayCounter = 0
-        self.money = 2000
-        self.system_population = 0
+        with self.clock.lock:
+            self.clock.rebase()
+            self.sim_time = 0
+            self.missions.clear()
+            self.rng = random.Random(self.seed)
+            self.command_log = CommandLog(self.seed)
+            self.yearCounter = 0
+            self.dayCounter = 0
+            self.money = 2000
 
-        for planet in self.galaxy_objects:
-            planet.reset()
+            self.economy.clear()
+            for planet in self.galaxy_objects:
+                planet.reset()
 
-        self.set_capital_planet()
+            self.set_capital_planet()
+        self.clock.publish()
 
 # end class world
 
 
 if __name__ == '__main__':
-    w = World()
-    base.run()
+    if '--headless' in sys.argv:
+        # Usage: NoC.py --headless [days]
+        args = [arg for arg in sys.argv[1:] if arg != '--headless']
+        w = World(headless=True)
+        stats = w.simulate(float(args[0]) if args else 365)
+        print('Simulated {days} days ({steps} steps) in {seconds:.3f}s, '
+              '{days_per_second:.1f} days/s'.format(**stats))
+    else:
+        # Usage: NoC.py [--threaded]
+        w = World(threaded='--threaded' in sys.argv)
+        w.enable_autosave('autosave.noc')
+        base.run()
@@ -0,0 +1,223 @@
+from collections import OrderedDict
+from direct.directnotify.DirectNotifyGlobal import directNotify
+from panda3d.core import *
+
+import heapq
+import time
+
+notify = directNotify.newCategory('AssetRegistry')
+
+
+class AssetRegistry():
+    '''Single place where models and textures get loaded. Every file is only
+    loaded once; models are handed out as instances of one shared master and
+    textures are shared between all users. Textures are reference counted and
+    kept in LRU order, so unused ones get evicted as soon as the texture memory
+    exceeds the budget (in bytes, None for no limit).
+
+    Assets can also be requested for streaming. Requests are served in order
+    of priority (lower first) by a task that loads textures within a per frame
+    time budget and hands models to Panda's asynchronous loader. Assets that
+    fail to load are logged and count as served, their callbacks never run.'''
+
+    def __init__(self, texture_budget=256 * 1024**2):
+        self.texture_budget = texture_budget
+        self.models = {}
+        self.model_memory = {}
+        self.textures = OrderedDict()  # Least recently used first
+        self.texture_memory = {}
+        self.texture_users = {}
+        self.texture_bytes = 0
+
+        self.queue = []         # Heap of (priority, sequence, kind, path)
+        self.waiting = {}       # (kind, path) -> callbacks to call once loaded
+        self.requested = 0
+        self.completed = 0
+        self.failed = []        # (kind, path) of every asset that failed to load
+        self.frame_budget = 0.008
+
+    # Models
+    # ------
+
+    def load_model(self, path):
+        '''Returns the shared master of a model. It must not be changed or
+        reparented, use instance_model() or copy_model() for that.'''
+
+        model = self.models.get(path)
+        if model is None:
+            model = loader.loadModel(path)
+            self.add_model(path, model)
+        return model
+
+    def add_model(self, path, model):
+        self.models[path] = model
+        self.model_memory[path] = self._estimate_model_memory(model)
+
+    def instance_model(self, path, parent):
+        return self.load_model(path).instanceTo(parent)
+
+    def copy_model(self, path, parent):
+        return self.load_model(path).copyTo(parent)
+
+    def find(self, path, name):
+        return self.load_model(path).find(name)
+
+    def find_maps(self, path):
+        '''The (normal, active, normal, disabled) geoms of a button egg'''
+
+        model = self.load_model(path)
+        return (model.find('**/normal'), model.find('**/active'),
+                model.find('**/normal'), model.find('**/disabled'))
+
+    # Textures
+    # --------
+
+    def load_texture(self, path):
+        '''Returns a shared texture without claiming it, so it can be evicted
+        once nobody else uses it.'''
+
+        texture = self.textures.get(path)
+        if texture is None:
+            texture = loader.loadTexture(path)
+            self.add_texture(path, texture)
+        else:
+            self.textures.move_to_end(path)
+        return texture
+
+    def add_texture(self, path, texture):
+        self.textures[path] = texture
+        self.texture_memory[path] = texture.estimateTextureMemory()
+        self.texture_bytes += self.texture_memory[path]
+        self.texture_users.setdefault(path, 0)
+        self.evict()
+
+    def acquire_texture(self, path):
+        '''Returns a shared texture and keeps it from being evicted until it
+        gets released again'''
+
+        self.texture_users[path] = self.texture_users.get(path, 0) + 1
+        return self.load_texture(path)
+
+    def release_texture(self, path):
+        if self.texture_users.get(path, 0) > 0:
+            self.texture_users[path] -= 1
+            self.evict()
+
+    def evict(self):
+        if self.texture_budget is None:
+            return
+
+        for path in list(self.textures):
+            if self.texture_bytes <= self.texture_budget:
+                break
+            if self.texture_users[path] == 0:
+                texture = self.textures.pop(path)
+                self.texture_bytes -= self.texture_memory.pop(path)
+                self.texture_users.pop(path)
+                TexturePool.releaseTexture(texture)
+
+    # Streaming
+    # ---------
+
+    def request_model(self, path, parent=None, callback=None, priority=0):
+        '''Instances the model below parent and/or calls callback(model) with
+        the shared master as soon as it is loaded'''
+
+        def on_loaded(model):
+            if parent is not None:
+                model.instanceTo(parent)
+            if callback is not None:
+                callback(model)
+
+        self._request('model', path, on_loaded, priority)
+
+    def request_texture(self, path, target=None, callback=None, priority=0):
+        '''Claims the texture for target and/or calls callback(texture) as
+        soon as it is loaded. Without either it just gets cached.'''
+
+        def on_loaded(texture):
+            if target is not None:
+                target.setTexture(self.acquire_texture(path), 1)
+            if callback is not None:
+                callback(texture)
+
+        self._request('texture', path, on_loaded, priority)
+
+    def _request(self, kind, path, callback, priority):
+        self.requested += 1
+        loaded = self.models.get(path) if kind == 'model' else self.textures.get(path)
+        if loaded is not None:
+            self.completed += 1
+            callback(loaded)
+        elif (kind, path) in self.waiting:
+            self.waiting[(kind, path)].append(callback)
+        else:
+            self.waiting[(kind, path)] = [callback]
+            heapq.heappush(self.queue, (priority, self.requested, kind, path))
+
+    def start_streaming(self):
+        taskMgr.add(self.stream_task, 'assetStreamTask')
+
+    def stream_task(self, task):
+        start = time.perf_counter()
+        while self.queue and time.perf_counter() - start < self.frame_budget:
+            priority, seq, kind, path = heapq.heappop(self.queue)
+            if kind == 'model':
+                loader.loadModel(path, callback=self._on_model_loaded, extraArgs=[path])
+            else:
+                try:
+                    texture = self.load_texture(path)
+                except OSError as error:
+                    notify.warning(str(error))
+                    texture = None
+                self._finish('texture', path, texture)
+        return task.cont if self.queue else task.done
+
+    def _on_model_loaded(self, model, path):
+        if model is not None:
+            self.add_model(path, model)
+        else:
+            notify.warning('Could not load model: {}'.format(path))
+        self._finish('model', path, model)
+
+    def _finish(self, kind, path, asset):
+        callbacks = self.waiting.pop((kind, path), [])
+        self.completed += len(callbacks)
+        if asset is None:
+            self.failed.append((kind, path))
+        else:
+            for callback in callbacks:
+                callback(asset)
+
+    def progress(self):
+        '''Share of all requests that got served so far, from 0 to 1'''
+
+        if self.requested == 0:
+            return 1.0
+        return self.completed / self.requested
+
+    # Statistics
+    # ----------
+
+    def total_texture_memory(self):
+        return self.texture_bytes
+
+    def memory_report(self):
+        '''List of (kind, path, bytes, users) of every loaded asset'''
+
+        report = [('model', path, size, None) for path, size in self.model_memory.items()]
+        report += [('texture', path, self.texture_memory[path], self.texture_users[path])
+                   for path in self.textures]
+        return report
+
+    def _estimate_model_memory(self, model):
+        size = 0
+        for geom_np in model.findAllMatches('**/+GeomNode'):
+            for geom in geom_np.node().getGeoms():
+                data = geom.getVertexData()
+                for i in range(data.getNumArrays()):
+                    size += data.getArray(i).getDataSizeBytes()
+                for primitive in geom.getPrimitives():
+                    if primitive.getVertices() is not None:
+                        size += primitive.getVertices().getDataSizeBytes()
+        return size
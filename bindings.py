@@ -0,0 +1,47 @@
+class TextBinding():
+    '''Binds the text of a label to some values of the game. values() returns
+    a tuple of the current values, text(*values) the string to show. The text
+    only gets rebuilt when one of the values changed since the last refresh.'''
+
+    def __init__(self, label, values, text):
+        self.label = label
+        self.values = values
+        self.text = text
+        self.last = None
+
+    def refresh(self):
+        values = self.values()
+        if values == self.last:
+            return False
+        self.last = values
+        self.label['text'] = self.text(*values)
+        return True
+
+
+class Bindings():
+    '''Group of text bindings refreshed together by one job of the frame
+    scheduler, at most rate times per second. Frames in between do no work
+    at all.'''
+
+    def __init__(self, scheduler, name, rate=10, priority=1):
+        self.scheduler = scheduler
+        self.name = name
+        self.rate = rate
+        self.priority = priority
+        self.bindings = []
+
+    def bind(self, label, values, text):
+        binding = TextBinding(label, values, text)
+        self.bindings.append(binding)
+        binding.refresh()
+        if not self.scheduler.has(self.name):
+            self.scheduler.every(1 / self.rate, self.refresh, self.name, self.priority)
+        return binding
+
+    def clear(self):
+        self.bindings = []
+        self.scheduler.remove(self.name)
+
+    def refresh(self):
+        for binding in self.bindings:
+            binding.refresh()
@@ -1,30 +1,46 @@
 from direct.showbase.DirectObject import DirectObject
 from panda3d.core import *
-from direct.interval.IntervalGlobal import *
 
 class CameraController(DirectObject):
-    def	__init__(self):
+    # The controller is a small state machine. In the 'free' state the player
+    # moves and orbits the camera, 'transition' glides it to a target view and
+    # 'follow' keeps it locked onto a body. One update task does all of it and
+    # only runs while input is held, a transition is going or a body is followed.
+
+    TRANSITION_TIME = 0.2
+
+    # Anchor heading/pitch and camera offset (in units of the body scale) of
+    # the views that follow a body
+    VIEWS = {
+        'info': (Vec3(0, -45, 0), Vec3(-1.22, -5.5, 0)),
+        'build': (Vec3(0, 0, 0), Vec3(-0.9, -3.4, 0))
+    }
+
+    def __init__(self):
         base.disableMouse()
 
         self.setupVars()
         self.setupCamera()
         self.setupInput()
-        self.setupTasks()
 
     def setupVars(self):
-        self.initZoom = 50			# Camera's initial distance from anchor
-        self.zoomInLimit = 1		# Camera's minimum distance from anchor
+        self.initZoom = 50          # Camera's initial distance from anchor
+        self.zoomInLimit = 1        # Camera's minimum distance from anchor
         self.zoomOutLimit = 500     # Camera's maximum distance from anchor
-        self.moveSpeed = .2			# Rate of movement for the anchor
-        self.zoom = None
+        self.moveSpeed = 12         # Units per second the anchor moves
         self.orbit = None
-        self.move = None
         self.move_dict = {
             'foreward': False,
             'back': False,
             'left': False,
             'right': False}
 
+        self.state = 'free'
+        self.target = None          # Followed body
+        self.mode = None            # View used for the followed body
+        self.transition = None      # Start and end values of the transition
+        self.elapsed = 0
+
     def setupCamera(self):
         self.camAnchor = render.attachNewNode("Cam Anchor")
         base.camera.reparentTo(self.camAnchor)
@@ -45,67 +61,23 @@ class CameraController(DirectObject):
         self.accept("d", self.setMove, [True, 'right'])
         self.accept('d-up', self.setMove, [False, 'right'])
 
-    def setupTasks(self):
-        taskMgr.add(self.cameraOrbit, "Camera Orbit")
-        taskMgr.add(self.camera_move_task, "Camera Move")
+    # Input
+    # -----
 
     def setOrbit(self, orbit):
-        if orbit:
+        self.orbit = None
+        if orbit and base.mouseWatcherNode.hasMouse():
             props = base.win.getProperties()
-            winX = props.getXSize()
-            winY = props.getYSize()
-            if base.mouseWatcherNode.hasMouse():
-                mX = base.mouseWatcherNode.getMouseX()
-                mY = base.mouseWatcherNode.getMouseY()
-                mPX = winX * ((mX + 1) / 2)
-                mPY = winY * ((-mY + 1) / 2)
+            mX = base.mouseWatcherNode.getMouseX()
+            mY = base.mouseWatcherNode.getMouseY()
+            mPX = props.getXSize() * ((mX + 1) / 2)
+            mPY = props.getYSize() * ((-mY + 1) / 2)
             self.orbit = [[mX, mY], [mPX, mPY]]
-        else:
-            self.orbit = None
-
-    def cameraOrbit(self, task):
-        if(self.orbit != None):
-            if base.mouseWatcherNode.hasMouse():
-
-                mpos = base.mouseWatcherNode.getMouse()
-
-                base.win.movePointer(0, int(self.orbit[1][0]), int(self.orbit[1][1]))
-
-                deltaH = 90 * (mpos[0] - self.orbit[0][0])
-                deltaP = 90 * (mpos[1] - self.orbit[0][1])
-
-                limit = .5
-
-                if(-limit < deltaH and deltaH < limit):
-                    deltaH = 0
-                elif(deltaH > 0):
-                    deltaH - limit
-                elif(deltaH < 0):
-                    deltaH + limit
-
-                if(-limit < deltaP and deltaP < limit):
-                    deltaP = 0
-                elif(deltaP > 0):
-                    deltaP - limit
-                elif(deltaP < 0):
-                    deltaP + limit
-
-                newH = (self.camAnchor.getH() + -deltaH)
-                newP = (self.camAnchor.getP() + deltaP)
-                if(newP < -90):
-                    newP = -90
-                if(newP > 90):
-                    newP = 90
-
-                if(newH < -180):
-                    newH += 360
-                if(newH > 180):
-                    newH -= 360
-                self.camAnchor.setHpr(newH, newP, 0)
-
-        return task.cont
+        self.wake()
 
     def setZoom(self, zoom):
+        if self.state != 'free':
+            return
         if zoom == 'in':
             deltaY = -2
         elif zoom == 'out':
@@ -121,81 +93,110 @@ class CameraController(DirectObject):
 
     def setMove(self, value, direction):
         self.move_dict.update({direction: value})
+        self.wake()
 
-    def camera_move_task(self, task):
-        if self.move_dict['foreward']:
-            self.camAnchor.setY(self.camAnchor, self.moveSpeed)
-            self.camAnchor.setZ(0)
-        if self.move_dict['back']:
-            self.camAnchor.setY(self.camAnchor, -self.moveSpeed)
-            self.camAnchor.setZ(0)
-        if self.move_dict['left']:
-            self.camAnchor.setX(self.camAnchor, -self.moveSpeed)
-        if self.move_dict['right']:
-            self.camAnchor.setX(self.camAnchor, self.moveSpeed)
-        return task.cont
+    # Transitions
+    # -----------
 
     def reset(self):
-        anchorPos = self.camAnchor.getPos()
-        anchorHpr = self.camAnchor.getHpr()
-
-        taskMgr.remove('infocamTask')
-        taskMgr.remove('buildcamTask')
-        transition = Parallel(
-            self.camAnchor.posInterval(0.2, Vec3(0, 0, 0), anchorPos),
-            self.camAnchor.hprInterval(0.2, Vec3(0, -45, 0), anchorHpr),
-            base.camera.posInterval(0.2, Vec3(0, -50, 0), base.camera.getPos())
-        )
-        transition.start()
-
+        self.start_transition(None, None, Vec3(0, -45, 0), Vec3(0, -50, 0))
 
     def info_view_to(self, obj):
-        taskMgr.remove('buildcamTask')  # in case of coming from Build view
-        transition = Sequence(
-            Parallel(
-                self.camAnchor.posInterval(
-                    0.2, obj.getPos(), self.camAnchor.getPos()),
-                self.camAnchor.hprInterval(
-                    0.2, Vec3(0, -45, 0), self.camAnchor.getHpr()),
-                base.camera.posInterval(
-                    0.2, Vec3(-1.22 * obj.scale, -5.5 * obj.scale, 0), base.camera.getPos())
-            ),
-            Func(self._add_follow_cam, 'info', obj)
-        )
-        transition.start()
+        self.start_transition(obj, 'info', *self.view_of(obj, 'info'))
 
     def build_view_to(self, obj):
-        taskMgr.remove('infocamTask')
-        transition = Sequence(
-            Parallel(
-                self.camAnchor.posInterval(
-                    0.2, obj.getPos(), self.camAnchor.getPos()),
-                self.camAnchor.hprInterval(
-                    0.2, Vec3(0, 0, 0), self.camAnchor.getHpr()),
-                base.camera.posInterval(
-                    0.2, Vec3(-0.9 * obj.scale, -3.4 * obj.scale, 0), base.camera.getPos())
-            ),
-            Func(self._add_follow_cam, 'build', obj)
-        )
-        transition.start()
-
-    def _add_follow_cam(self, mode, obj):
-        taskMgr.add(
-                self._follow_cam_task,
-                'infocamTask',
-                extraArgs=[obj, obj.scale, mode],
-                appendTask=True
-        )
-
-    def _follow_cam_task(self, obj, scale, mode, task):
-        pos = obj.getPos()
-
-        if mode == 'info':
-            self.camAnchor.setPos(pos)
-            self.camAnchor.setHpr(0, -45, 0)
-            base.camera.setPos(-1.22 * scale, -5.5 * scale, 0)
-        if mode == 'build':
-            self.camAnchor.setPos(pos)
-            self.camAnchor.setHpr(0, 0, 0)
-            base.camera.setPos(-.9 * scale, -3.4 * scale, 0)
-        return task.cont
+        self.start_transition(obj, 'build', *self.view_of(obj, 'build'))
+
+    def view_of(self, obj, mode):
+        hpr, offset = self.VIEWS[mode]
+        return hpr, offset * obj.scale
+
+    def start_transition(self, obj, mode, hpr, cam_pos):
+        self.state = 'transition'
+        self.target = obj
+        self.mode = mode
+        self.elapsed = 0
+        self.transition = (self.camAnchor.getPos(), self.camAnchor.getHpr(), base.camera.getPos(),
+                           hpr, cam_pos)
+        self.wake()
+
+    # Update
+    # ------
+
+    def active(self):
+        if self.state != 'free':
+            return True
+        return self.orbit is not None or any(self.move_dict.values())
+
+    def wake(self):
+        if self.active() and not taskMgr.hasTaskNamed('cameraTask'):
+            taskMgr.add(self.update_task, 'cameraTask')
+
+    def update_task(self, task):
+        dt = globalClock.getDt()
+
+        if self.state == 'free':
+            self.update_orbit()
+            self.update_move(dt)
+        elif self.state == 'transition':
+            self.update_transition(dt)
+        elif self.state == 'follow':
+            self.camAnchor.setPos(self.target.getPos())
+
+        return task.cont if self.active() else task.done
+
+    def update_transition(self, dt):
+        self.elapsed += dt
+        t = min(1, self.elapsed / self.TRANSITION_TIME)
+        start_pos, start_hpr, start_cam, hpr, cam_pos = self.transition
+        target_pos = self.target.getPos() if self.target is not None else Point3(0, 0, 0)
+
+        self.camAnchor.setPos(start_pos + (target_pos - start_pos) * t)
+        self.camAnchor.setHpr(start_hpr + (hpr - start_hpr) * t)
+        base.camera.setPos(start_cam + (cam_pos - start_cam) * t)
+
+        if t == 1:
+            self.transition = None
+            self.state = 'free' if self.target is None else 'follow'
+
+    def update_orbit(self):
+        if self.orbit is None or not base.mouseWatcherNode.hasMouse():
+            return
+
+        mpos = base.mouseWatcherNode.getMouse()
+        base.win.movePointer(0, int(self.orbit[1][0]), int(self.orbit[1][1]))
+
+        deltaH = 90 * (mpos[0] - self.orbit[0][0])
+        deltaP = 90 * (mpos[1] - self.orbit[0][1])
+
+        limit = .5
+        if -limit < deltaH < limit:
+            deltaH = 0
+        if -limit < deltaP < limit:
+            deltaP = 0
+
+        newH = (self.camAnchor.getH() + -deltaH)
+        newP = (self.camAnchor.getP() + deltaP)
+        if(newP < -90):
+            newP = -90
+        if(newP > 90):
+            newP = 90
+
+        if(newH < -180):
+            newH += 360
+        if(newH > 180):
+            newH -= 360
+        self.camAnchor.setHpr(newH, newP, 0)
+
+    def update_move(self, dt):
+        step = self.moveSpeed * dt
+        if self.move_dict['foreward']:
+            self.camAnchor.setY(self.camAnchor, step)
+            self.camAnchor.setZ(0)
+        if self.move_dict['back']:
+            self.camAnchor.setY(self.camAnchor, -step)
+            self.camAnchor.setZ(0)
+        if self.move_dict['left']:
+            self.camAnchor.setX(self.camAnchor, -step)
+        if self.move_dict['right']:
+            self.camAnchor.setX(self.camAnchor, step)
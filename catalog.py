@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import buildingsDB
+from economy import Economy
+
+# Version of the compiled cache format, bump it whenever Catalog changes
+CACHE_VERSION = 4
+
+
+class Blueprint():
+    '''One buildable structure, a view on its row in the catalog columns'''
+
+    __slots__ = ('catalog', 'id')
+
+    def __init__(self, catalog, id):
+        self.catalog = catalog
+        self.id = id
+
+    def __getattr__(self, field):
+        # Only called for fields, the slots are found before
+        column = self.catalog.columns.get(field)
+        if column is None:
+            raise AttributeError(field)
+        value = column[self.id]
+        return value.item() if isinstance(value, np.generic) else value
+
+    @property
+    def section(self):
+        return Economy.SECTION_ORDER[self.catalog.columns['section'][self.id]]
+
+    def __eq__(self, other):
+        return isinstance(other, Blueprint) and other.catalog is self.catalog and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return 'Blueprint({!r})'.format(self.name)
+
+
+class Catalog():
+    '''All blueprints compiled from the buildings DB into columns indexed by
+    integer IDs in section order. Numeric fields are numpy arrays, texts are
+    lists. Indexes by name, section, required resource, produced good and
+    consumed good map to arrays of IDs. compile() builds the columns from
+    the buildings DB, the indexes get built from the columns.'''
+
+    # Field of the compiled columns -> key in the buildings DB
+    FIELDS = {
+        'name': None, 'section': None, 'kind': None,
+        'price': 'price', 'time': 'time', 'enr_drain': 'enrDrain',
+        'yield_good': 'yield', 'inc_val': 'incVal', 'req': 'req', 'dec_val': 'decVal',
+        'yield_text': 'yieldText', 'req_text': 'reqText', 'desc': 'desc', 'img': 'img'
+    }
+    NUMERIC = ('section', 'kind', 'price', 'time', 'enr_drain', 'inc_val', 'dec_val')
+
+    def __init__(self, columns, version=None):
+        self.version = version      # Hash of the data file the catalog came from
+        self.columns = columns
+
+        ids = np.arange(len(columns['name']), dtype=np.int32)
+        self.by_name = {name: id for id, name in enumerate(columns['name'])}
+        self.by_section = {section: ids[columns['section'] == n]
+                           for n, section in enumerate(Economy.SECTION_ORDER)}
+        self.by_requirement = self._index(ids, columns['req'])
+        producing = np.isin(columns['kind'], (Economy.EXTRACT, Economy.PROCESS))
+        self.by_product = self._index(ids[producing], columns['yield_good'])
+        self.by_consumed = self._index(ids[columns['dec_val'] > 0], columns['req'])
+
+    @classmethod
+    def compile(cls, db, version=None):
+        columns = {field: [] for field in cls.FIELDS}
+        for section in Economy.SECTION_ORDER:
+            for name, data in db.get(section, {}).items():
+                for field, key in cls.FIELDS.items():
+                    if key is not None:
+                        columns[field].append(data[key])
+                columns['name'].append(name)
+                columns['section'].append(Economy.SECTION_ORDER.index(section))
+                columns['kind'].append(cls.kind_of(section, data))
+
+        for field in cls.NUMERIC:
+            array = np.array(columns[field])
+            if array.dtype.kind == 'f' and np.all(array == np.round(array)):
+                array = array.astype(np.int64)
+            columns[field] = array
+        return cls(columns, version)
+
+    @staticmethod
+    def kind_of(section, data):
+        # What a building does in the economy follows from its data alone
+        if section == 'RES':
+            return Economy.EXTRACT
+        if section == 'PRO':
+            return Economy.PROCESS
+        if section == 'ENR' and data['decVal'] > 0:
+            return Economy.CONSUME
+        return Economy.IDLE
+
+    def _index(self, ids, keys):
+        index = {}
+        for id in ids.tolist():
+            if keys[id] is not None:
+                index.setdefault(keys[id], []).append(id)
+        return {key: np.array(value, np.int32) for key, value in index.items()}
+
+    def __getitem__(self, name):
+        return Blueprint(self, self.by_name[name])
+
+    def __iter__(self):
+        return (Blueprint(self, id) for id in range(len(self)))
+
+    def __len__(self):
+        return len(self.columns['name'])
+
+    def blueprints(self, ids):
+        return [Blueprint(self, id) for id in ids.tolist()]
+
+    def in_section(self, section):
+        return self.blueprints(self.by_section[section])
+
+    def requiring(self, resource):
+        return self.blueprints(self.by_requirement.get(resource, np.empty(0, np.int32)))
+
+    def producing(self, good):
+        return self.blueprints(self.by_product.get(good, np.empty(0, np.int32)))
+
+    def consuming(self, good):
+        return self.blueprints(self.by_consumed.get(good, np.empty(0, np.int32)))
+
+
+def load_catalog(path=buildingsDB.DB_PATH, cache_path=None):
+    '''Loads the catalog of a data file. The compiled columns get cached in a
+    sidecar file next to it, keyed by the hash of the data file, so unchanged
+    catalogs skip parsing, validating and compiling. The cache holds only
+    JSON and raw numeric arrays, nothing in it can run code when loaded.'''
+
+    if cache_path is None:
+        cache_path = path + '.cache'
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    key = [CACHE_VERSION, digest]
+
+    try:
+        columns = _read_cache(cache_path, key)
+        if columns is not None:
+            return Catalog(columns, digest)
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    catalog = Catalog.compile(buildingsDB.loadDB(path), digest)
+    try:
+        tmp_path = cache_path + '.tmp'
+        _write_cache(tmp_path, key, catalog.columns)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass    # Read-only installs just compile on every start
+    return catalog
+
+
+# The cache file is a line with the JSON key, a line with the JSON texts and
+# the dtype and shape of every numeric column, then the raw column data.
+
+def _write_cache(path, key, columns):
+    arrays = [(field, np.ascontiguousarray(columns[field])) for field in Catalog.NUMERIC]
+    meta = {
+        'texts': {field: columns[field] for field in Catalog.FIELDS if field not in Catalog.NUMERIC},
+        'arrays': [(field, array.dtype.str, array.shape) for field, array in arrays]}
+    with open(path, 'wb') as f:
+        f.write(json.dumps(key).encode() + b'\n')
+        f.write(json.dumps(meta).encode() + b'\n')
+        for field, array in arrays:
+            f.write(array.tobytes())
+
+
+def _read_cache(path, key):
+    # Returns the cached columns, or None if the cache is for other data
+    with open(path, 'rb') as f:
+        if json.loads(f.readline()) != key:
+            return None
+        meta = json.loads(f.readline())
+        columns = dict(meta['texts'])
+        for field, dtype, shape in meta['arrays']:
+            dtype = np.dtype(dtype)
+            if dtype.kind not in 'biuf':
+                raise ValueError('Unsupported column type {} in catalog cache'.format(dtype))
+            size = dtype.itemsize * int(np.prod(shape))
+            data = f.read(size)
+            if len(data) < size:
+                raise ValueError('Catalog cache is truncated')
+            columns[field] = np.frombuffer(data, dtype).reshape(shape).copy()
+    return columns
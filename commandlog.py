@@ -0,0 +1,64 @@
+import json
+
+
+class CommandLog():
+    '''Append-only record of every state changing player command together with
+    the simulation tick it was issued at. Together with the seed of the world
+    it is enough to replay a whole session. If a path is given, every command
+    also gets appended to that file right away, one compact JSON line each.'''
+
+    def __init__(self, seed, path=None):
+        self.seed = seed
+        self.entries = []
+        self.path = path
+
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(json.dumps({'seed': seed}) + '\n')
+
+    def append(self, tick, command, args):
+        entry = (tick, command, tuple(args))
+        self.entries.append(entry)
+
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write(self._encode(entry) + '\n')
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def since(self, start):
+        # Entries from index start on, as lists ready for JSON
+        return [[tick, command] + list(args) for tick, command, args in self.entries[start:]]
+
+    def extend(self, entries):
+        # Adds entries as since() returns them, without writing them to path
+        for tick, command, *args in entries:
+            self.entries.append((tick, command, tuple(args)))
+
+    def dumps(self):
+        lines = [json.dumps({'seed': self.seed})]
+        lines += [self._encode(entry) for entry in self.entries]
+        return '\n'.join(lines) + '\n'
+
+    @classmethod
+    def loads(cls, text):
+        lines = text.splitlines()
+        log = cls(json.loads(lines[0])['seed'])
+        for line in lines[1:]:
+            if line:
+                tick, command, *args = json.loads(line)
+                log.entries.append((tick, command, tuple(args)))
+        return log
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.loads(f.read())
+
+    def _encode(self, entry):
+        tick, command, args = entry
+        return json.dumps([tick, command] + list(args), separators=(',', ':'))
@@ -0,0 +1,475 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+
+
+class Economy():
+    '''Owns every building and the goods of all planets and advances them
+    together in one tick. Goods are kept in a planets x goods matrix and
+    buildings in flat attribute arrays, both indexed by IDs interned from
+    the buildings DB, so a tick is a handful of vectorized operations no
+    matter how many planets exist. Whenever buildings compete for the same
+    good, the one in the lower planet/section/slot position is served first.'''
+
+    SECTION_ORDER = ('RES', 'PRO', 'ENR', 'DEV', 'HAB')
+
+    # Building kinds and problem codes as stored in b_kind and b_problem
+    IDLE, EXTRACT, PROCESS, CONSUME = range(4)
+    NO_PROBLEM, ENERGY_PROBLEM, STORAGE_PROBLEM, MISSING_PROBLEM = range(4)
+
+    # Output factor of extractors by the purity of the resource they mine
+    PURITY_FACTORS = {'Common': 2, 'Rare': 0.5}
+
+    BUILDING_FIELDS = (
+        ('alive', bool), ('planet', np.int32), ('section', np.int8), ('slot', np.int8),
+        ('blueprint', np.int32), ('kind', np.int8), ('in', np.int32), ('out', np.int32),
+        ('inc', np.float64), ('dec', np.float64), ('factor', np.float64),
+        ('problem', np.int8), ('workers', np.int32), ('output', np.float64))
+
+    def __init__(self, world, tick_delay=3):
+        self.world = world
+        self.tick_delay = tick_delay
+        self.tick_count = 0
+
+        self.good_ids = {}
+        self.good_names = []
+        self.blueprint_ids = {}
+        self.blueprint_names = []
+        self.intern_catalog(world.catalog)
+
+        self.planets = []
+        self.goods = np.zeros((0, len(self.good_names)))
+        self.present = np.zeros((0, len(self.good_names)), bool)
+        self.energy_cap = np.zeros(0, np.int64)
+        self.energy_usg = np.zeros(0, np.int64)
+        self.dirty = np.zeros(0, bool)  # Planets changed since the last stamp()
+        self.changed = np.zeros(0, np.int64)    # Generation of their last change
+        self.generation = 0
+
+        self.b_capacity = 0
+        self.free_ids = []
+        self.slot_ids = {}
+        for field, dtype in self.BUILDING_FIELDS:
+            setattr(self, 'b_' + field, np.zeros(0, dtype))
+        self._grow_buildings(64)
+
+    def clear(self):
+        self.b_alive[:] = False
+        self.b_problem[:] = self.NO_PROBLEM
+        self.free_ids = list(range(self.b_capacity - 1, -1, -1))
+        self.slot_ids = {}
+
+    # Interning and storage
+    # ---------------------
+
+    def intern_catalog(self, catalog):
+        # Blueprint IDs of the economy are the IDs of the catalog
+        for bp in catalog:
+            self.intern_blueprint(bp.name)
+            if bp.kind in (self.EXTRACT, self.PROCESS):
+                self.intern_good(bp.yield_good)
+            if bp.dec_val > 0:
+                self.intern_good(bp.req)
+
+    def intern_blueprint(self, name):
+        if name not in self.blueprint_ids:
+            self.blueprint_ids[name] = len(self.blueprint_names)
+            self.blueprint_names.append(name)
+        return self.blueprint_ids[name]
+
+    def intern_good(self, name):
+        if name not in self.good_ids:
+            self.good_ids[name] = len(self.good_names)
+            self.good_names.append(name)
+            self.world.ledger.grow_goods(len(self.good_names))
+            if hasattr(self, 'goods'):
+                self.goods = np.hstack((self.goods, np.zeros((len(self.planets), 1))))
+                self.present = np.hstack((self.present, np.zeros((len(self.planets), 1), bool)))
+        return self.good_ids[name]
+
+    def register_planet(self, planet):
+        row = len(self.planets)
+        self.planets.append(planet)
+        self.goods = np.vstack((self.goods, np.zeros((1, len(self.good_names)))))
+        self.present = np.vstack((self.present, np.zeros((1, len(self.good_names)), bool)))
+        self.energy_cap = np.append(self.energy_cap, 0)
+        self.energy_usg = np.append(self.energy_usg, 0)
+        self.dirty = np.append(self.dirty, True)
+        self.changed = np.append(self.changed, 0)
+        return row
+
+    def mark_dirty(self, planet):
+        self.dirty[planet.eco_id] = True
+
+    def stamp(self):
+        '''Files the planets marked dirty under a new generation and returns
+        it. Whoever keeps the generation gets the planets changed after it
+        from changed_since(), no matter who else stamps in the meantime.'''
+
+        self.generation += 1
+        self.changed[self.dirty] = self.generation
+        self.dirty[:] = False
+        return self.generation
+
+    def changed_since(self, generation):
+        return np.flatnonzero(self.changed > generation)
+
+    def set_goods(self, row, goods):
+        self.dirty[row] = True
+        self.world.ledger.goods -= self.goods[row]
+        self.goods[row] = 0
+        self.present[row] = False
+        for good, value in goods.items():
+            gid = self.intern_good(good)
+            self.goods[row, gid] = value
+            self.present[row, gid] = True
+        self.world.ledger.goods += self.goods[row]
+
+    def _grow_buildings(self, capacity):
+        for field, dtype in self.BUILDING_FIELDS:
+            old = getattr(self, 'b_' + field)
+            new = np.zeros(capacity, dtype)
+            new[:len(old)] = old
+            setattr(self, 'b_' + field, new)
+        self.free_ids += list(range(capacity - 1, self.b_capacity - 1, -1))
+        self.b_capacity = capacity
+
+    # Construction and salvaging
+    # --------------------------
+
+    def construct_building(self, planet, section, slot, b_name):
+        # Returns None on success, otherwise the reason why it was not built
+        world = self.world
+        slots = getattr(planet, 'slots', {}).get(section, {})
+        if slot not in slots:
+            return 'No such slot'
+        if slots[slot] is not None:
+            return 'Slot is occupied'
+        if b_name not in world.catalog.by_name:
+            return 'Unknown building'
+        bp = world.catalog[b_name]
+        if bp.section != section:
+            return 'Building does not fit the slot'
+
+        if world.money < bp.price:
+            return 'Not enough Money'
+
+        if section == 'ENR':
+            planet.energy_cap += bp.inc_val
+        elif planet.energy_usg + bp.enr_drain > planet.energy_cap:
+            return 'Not sufficient Energy'
+        elif section == 'RES':
+            if bp.req == 'Athmosphere':
+                if not planet.athmosphere:
+                    return 'No Athmosphere present'
+            elif bp.req not in planet.rescources:
+                return 'Needed Rescource is not available'
+            planet.energy_usg += bp.enr_drain
+        else:
+            if section == 'HAB':
+                planet.habitation_cap += bp.inc_val
+            planet.energy_usg += bp.enr_drain
+
+        if bp.kind == self.EXTRACT:
+            p_factor = self.PURITY_FACTORS.get(planet.rescources.get(bp.req), 1)
+            building = self.add_extractor(
+                planet, section, slot, b_name, bp.yield_good, bp.inc_val, p_factor)
+        elif bp.kind == self.PROCESS:
+            building = self.add_processor(
+                planet, section, slot, b_name, bp.req, bp.yield_good, bp.inc_val, bp.dec_val)
+        elif bp.kind == self.CONSUME:
+            building = self.add_consumer(
+                planet, section, slot, b_name, bp.req, bp.dec_val, bp.inc_val)
+        else:
+            building = self.add_building(planet, section, slot, b_name)
+
+        planet.slots[section][slot] = building
+        world.money -= bp.price
+
+    def salvage_building(self, planet, section, slot):
+        # Returns None on success, otherwise the reason why it was not salvaged
+        world = self.world
+        slots = getattr(planet, 'slots', {}).get(section, {})
+        if slot not in slots:
+            return 'No such slot'
+        if slots[slot] is None:
+            return 'Slot is empty'
+        bp = world.catalog[slots[slot]['name']]
+
+        if section == 'ENR':
+            if (planet.energy_cap - bp.inc_val) < planet.energy_usg:
+                return 'Energy too low if salvaged'
+            planet.energy_cap -= bp.inc_val
+
+        planet.slots[section][slot] = None
+        planet.energy_usg -= bp.enr_drain
+        world.money += round(bp.price * world.salvage_factor)
+
+        self.remove_building(planet, section, slot)
+        world.remove_message(planet, section + slot)
+
+    # Building registration
+    # ---------------------
+
+    def add_building(self, planet, section, slot, b_name, kind=IDLE,
+                     inGood=None, outGood=None, incVal=0, decVal=0, p_factor=1):
+        if not self.free_ids:
+            self._grow_buildings(self.b_capacity * 2)
+        i = self.free_ids.pop()
+
+        self.b_alive[i] = True
+        self.b_planet[i] = planet.eco_id
+        self.b_section[i] = self.SECTION_ORDER.index(section)
+        self.b_slot[i] = int(slot)
+        self.b_blueprint[i] = self.intern_blueprint(b_name)
+        self.b_kind[i] = kind
+        self.b_in[i] = -1 if inGood is None else self.intern_good(inGood)
+        self.b_out[i] = -1 if outGood is None else self.intern_good(outGood)
+        self.b_inc[i] = incVal
+        self.b_dec[i] = decVal
+        self.b_factor[i] = p_factor
+        self.b_problem[i] = self.NO_PROBLEM
+        self.b_workers[i] = 0
+        self.b_output[i] = 0
+
+        self.slot_ids[(planet.eco_id, section, slot)] = i
+        self.dirty[planet.eco_id] = True
+        return BuildingSlot(self, i)
+
+    def add_extractor(self, planet, section, slot, b_name, good, incVal, p_factor):
+        return self.add_building(planet, section, slot, b_name, self.EXTRACT,
+                                 outGood=good, incVal=incVal, p_factor=p_factor)
+
+    def add_processor(self, planet, section, slot, b_name, inGood, outGood, incVal, decVal):
+        return self.add_building(planet, section, slot, b_name, self.PROCESS,
+                                 inGood=inGood, outGood=outGood, incVal=incVal, decVal=decVal)
+
+    def add_consumer(self, planet, section, slot, b_name, good, decVal, incVal):
+        return self.add_building(planet, section, slot, b_name, self.CONSUME,
+                                 inGood=good, incVal=incVal, decVal=decVal)
+
+    def remove_building(self, planet, section, slot):
+        i = self.slot_ids.pop((planet.eco_id, section, slot), None)
+        self.dirty[planet.eco_id] = True
+        if i is not None:
+            self.b_alive[i] = False
+            self.b_problem[i] = self.NO_PROBLEM
+            self.free_ids.append(i)
+
+    # Tick
+    # ----
+
+    def tick(self):
+        self.tick_count += 1
+        if not self.b_alive.any():
+            return
+
+        alive = self.b_alive
+        kind = self.b_kind
+        planet = self.b_planet
+        goods_in = np.maximum(self.b_in, 0)
+        goods_out = np.maximum(self.b_out, 0)
+        old = self.b_problem.copy()
+        problem = np.zeros_like(old)
+        ledger = self.world.ledger
+        self.b_output[:] = 0
+
+        # Extractors and processors run on the energy capacity of the last tick
+        energy_ok = (self.energy_cap >= self.energy_usg)[planet]
+
+        # Extractors
+        extractor = alive & (kind == self.EXTRACT)
+        self.present[planet[extractor], goods_out[extractor]] = True
+        full = self.goods[planet, goods_out] >= self.world.goods_cap
+        problem[extractor & ~energy_ok] = self.ENERGY_PROBLEM
+        problem[extractor & energy_ok & full] = self.STORAGE_PROBLEM
+        producing = extractor & energy_ok & ~full
+        self.b_output[producing] = self.b_inc[producing] * self.b_factor[producing]
+        np.add.at(self.goods, (planet[producing], goods_out[producing]), self.b_output[producing])
+        ledger.add_goods(goods_out[producing], self.b_output[producing])
+
+        # Processors
+        processor = alive & (kind == self.PROCESS)
+        self.present[planet[processor], goods_out[processor]] = True
+        full = self.goods[planet, goods_out] >= self.world.goods_cap
+        stock = np.where(self.present[planet, goods_in], self.goods[planet, goods_in], -1)
+        missing = stock < self.b_dec
+        blocked = processor & (~energy_ok | full)
+        problem[blocked & missing] = self.MISSING_PROBLEM
+        problem[blocked & ~missing & ~energy_ok] = self.ENERGY_PROBLEM
+        problem[blocked & ~missing & energy_ok & full] = self.STORAGE_PROBLEM
+        candidate = processor & ~blocked
+        producing = self._allocate(candidate)
+        problem[candidate & ~producing] = self.MISSING_PROBLEM
+        self.b_output[producing] = self.b_inc[producing]
+        np.add.at(self.goods, (planet[producing], goods_out[producing]), self.b_output[producing])
+        ledger.add_goods(goods_out[producing], self.b_output[producing])
+
+        # Consumers go last and decide about the energy capacity of the next tick
+        consumer = alive & (kind == self.CONSUME)
+        served = self._allocate(consumer)
+        problem[consumer & ~served] = self.MISSING_PROBLEM
+        problem = self._keep_first_problem(old, problem)
+        # Only power plants take their capacity with them
+        powering = consumer & (self.b_section == self.SECTION_ORDER.index('ENR'))
+        lost = powering & (old == self.NO_PROBLEM) & (problem != self.NO_PROBLEM)
+        regained = powering & (old != self.NO_PROBLEM) & (problem == self.NO_PROBLEM)
+        np.subtract.at(self.energy_cap, planet[lost], self.b_inc[lost].astype(np.int64))
+        np.add.at(self.energy_cap, planet[regained], self.b_inc[regained].astype(np.int64))
+        ledger.add_energy(cap=self.b_inc[regained].sum() - self.b_inc[lost].sum())
+
+        touched = (old != problem) | (self.b_output > 0) | served
+        self.dirty[planet[touched]] = True
+
+        self.b_problem = problem
+        for i in np.flatnonzero(old != problem):
+            self._problem_changed(i, old[i])
+
+    def _keep_first_problem(self, old, problem):
+        # A building that already reports a problem keeps its first reason
+        return np.where((old != self.NO_PROBLEM) & (problem != self.NO_PROBLEM), old, problem)
+
+    def _allocate(self, mask):
+        '''Hands out the input goods of every masked building in slot order and
+        takes them from the planet stock. A building that can not be supplied
+        uses up nothing, later ones still get served from what is left.
+        Returns a mask of supplied buildings.'''
+
+        supplied = np.zeros(self.b_capacity, bool)
+        ids = np.flatnonzero(mask)
+        if not ids.size:
+            return supplied
+
+        n_goods = len(self.good_names)
+        keys = self.b_planet[ids] * n_goods + self.b_in[ids]
+        order = np.lexsort((self.b_slot[ids], self.b_section[ids], keys))
+        ids, keys = ids[order], keys[order]
+
+        demand = self.b_dec[ids]
+        total = np.cumsum(demand)
+        group_start = np.r_[True, keys[1:] != keys[:-1]]
+        start_index = np.maximum.accumulate(np.where(group_start, np.arange(len(ids)), 0))
+        needed = total - (total - demand)[start_index]
+
+        stock = np.where(self.present.ravel()[keys], self.goods.ravel()[keys], -1)
+        ok = needed <= stock
+        # Serving the running totals is only right as long as all of them fit,
+        # groups with a shortfall get handed out one building at a time
+        for start in np.unique(start_index[~ok]):
+            left = stock[start]
+            for j in range(start, len(ids)):
+                if keys[j] != keys[start]:
+                    break
+                ok[j] = demand[j] <= left
+                if ok[j]:
+                    left -= demand[j]
+        supplied[ids[ok]] = True
+
+        used = np.bincount(keys[ok], weights=demand[ok], minlength=self.goods.size)
+        used = used.reshape(self.goods.shape)
+        self.goods -= used
+        self.world.ledger.goods -= used.sum(axis=0)
+        return supplied
+
+    def problem_text(self, i):
+        problem = self.b_problem[i]
+        if problem == self.ENERGY_PROBLEM:
+            if self.b_kind[i] == self.EXTRACT:
+                return 'Not enough energy to continue extraction'
+            return 'Not enough energy to continue production'
+        elif problem == self.STORAGE_PROBLEM:
+            return 'Storage is full'
+        elif problem == self.MISSING_PROBLEM:
+            if self.b_kind[i] == self.CONSUME:
+                return 'Missing {} to continue service'.format(self.good_names[self.b_in[i]])
+            return 'Missing {} to continue production'.format(self.good_names[self.b_in[i]])
+        return ''
+
+    def _problem_changed(self, i, old):
+        planet = self.planets[self.b_planet[i]]
+        section = self.SECTION_ORDER[self.b_section[i]]
+        slot = str(self.b_slot[i])
+        problem = self.b_problem[i]
+
+        if problem == self.NO_PROBLEM:
+            self.world.remove_message(planet, section + slot)
+        else:
+            message = {self.ENERGY_PROBLEM: 'Energy too low',
+                       self.STORAGE_PROBLEM: 'Storage full',
+                       self.MISSING_PROBLEM: 'Missing goods'}[problem]
+            self.world.add_message(planet, section + slot, 'problem',
+                                   self.blueprint_names[self.b_blueprint[i]], message)
+
+        self.world.clock.send(self.change_event(planet, section), [slot])
+
+    def change_event(self, planet, section):
+        # Name of the event sent whenever a building of that planet section
+        # changes its state. The event carries the slot as argument.
+        return 'buildingChanged-{}-{}'.format(planet.name, section)
+
+
+class BuildingSlot():
+    '''Read-only, dict-like view on one row of the building arrays. It is what
+    Planet.slots holds for a constructed building.'''
+
+    __slots__ = ('economy', 'id')
+
+    def __init__(self, economy, id):
+        self.economy = economy
+        self.id = id
+
+    def __getitem__(self, key):
+        e = self.economy
+        if key == 'name':
+            return e.blueprint_names[e.b_blueprint[self.id]]
+        elif key == 'gotProblem':
+            return bool(e.b_problem[self.id])
+        elif key == 'problemText':
+            return e.problem_text(self.id)
+        elif key == 'workers':
+            return int(e.b_workers[self.id])
+        elif key == 'output':
+            return _py_value(e.b_output[self.id])
+        raise KeyError(key)
+
+
+class PlanetGoods(MutableMapping):
+    '''Dict-like view on one planet row of the goods matrix.'''
+
+    def __init__(self, economy, row):
+        self.economy = economy
+        self.row = row
+
+    def __getitem__(self, good):
+        gid = self.economy.good_ids.get(good)
+        if gid is None or not self.economy.present[self.row, gid]:
+            raise KeyError(good)
+        return _py_value(self.economy.goods[self.row, gid])
+
+    def __setitem__(self, good, value):
+        gid = self.economy.intern_good(good)
+        self.economy.world.ledger.goods[gid] += value - self.economy.goods[self.row, gid]
+        self.economy.goods[self.row, gid] = value
+        self.economy.present[self.row, gid] = True
+        self.economy.dirty[self.row] = True
+
+    def __delitem__(self, good):
+        gid = self.economy.good_ids.get(good)
+        if gid is None or not self.economy.present[self.row, gid]:
+            raise KeyError(good)
+        self.economy.world.ledger.goods[gid] -= self.economy.goods[self.row, gid]
+        self.economy.goods[self.row, gid] = 0
+        self.economy.present[self.row, gid] = False
+        self.economy.dirty[self.row] = True
+
+    def __iter__(self):
+        names = self.economy.good_names
+        return iter([names[gid] for gid in np.flatnonzero(self.economy.present[self.row])])
+
+    def __len__(self):
+        return int(np.count_nonzero(self.economy.present[self.row]))
+
+
+def _py_value(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
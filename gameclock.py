@@ -0,0 +1,186 @@
+import heapq
+import threading
+import time
+
+from snapshot import SnapshotBuffer, capture
+
+
+class GameClock():
+    '''The one source of game time. Real time, scaled by the speed multiplier,
+    fills an accumulator that gets turned into whole simulation steps of the
+    world. All steps due in a frame run in one batch, at most max_steps of
+    them, so high speeds don't add callbacks per frame. Timers scheduled with
+    after() and every() run in game time as well and stop while paused.
+
+    Threaded, the steps run in a worker thread instead and the frame never
+    waits for them. The GUI then reads the world only through snapshot, and
+    everything else that touches the world from the frame has to hold lock.'''
+
+    SPEEDS = (1, 4, 16)
+
+    def __init__(self, world, step_time=1, max_steps=64):
+        self.world = world
+        self.step_time = step_time  # Real seconds per step at 1x
+        self.max_steps = max_steps  # Steps per frame before the clock lags behind
+        self.speed = 1
+        self.paused = False
+        self.accumulator = 0.0
+        self.timers = []            # Heap of (due, sequence, interval, callback)
+        self.sequence = 0
+
+        self.started = False
+        self.threaded = False
+        self.lock = threading.RLock()   # Held while the world changes
+        self.wakeup = threading.Condition()
+        self.pending = 0            # Steps handed to the worker, not yet started
+        self.queued = 0             # Steps handed to the worker, not yet published
+        self.buffer = SnapshotBuffer()
+        self.events = []            # Events sent by the worker during a run
+        self.outbox = []            # Events of published runs, for the frame
+
+    @property
+    def time(self):
+        # Game time including the part of the current step that already passed
+        if not self.threaded:
+            return self.world.sim_time + self.accumulator / self.step_time
+        with self.wakeup:
+            return self.buffer.front.sim_time + self.queued + self.accumulator / self.step_time
+
+    @property
+    def snapshot(self):
+        return self.buffer.front
+
+    def publish(self):
+        # Shows changes made outside of the steps, like player commands.
+        # Before start() nobody reads the snapshots.
+        if not self.started:
+            return
+        with self.lock:
+            state = capture(self.world)
+        with self.wakeup:
+            self.buffer.publish(state)
+
+    # Speed
+    # -----
+
+    def set_speed(self, speed):
+        self.speed = speed
+        self.paused = False
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+
+    # Stepping
+    # --------
+
+    def start(self, threaded=False):
+        self.started = True
+        self.threaded = threaded
+        self.publish()
+        if threaded:
+            worker = threading.Thread(target=self.worker, name='simulation', daemon=True)
+            worker.start()
+        taskMgr.add(self.clock_task, 'gameClockTask')
+
+    def send(self, event, args=[]):
+        # Events of the simulation are always handled on the frame's thread,
+        # and only once a snapshot that shows their changes is published
+        if not self.started:
+            messenger.send(event, args)
+        elif threading.current_thread() is threading.main_thread():
+            with self.wakeup:
+                self.outbox.append((event, args))
+        else:
+            self.events.append((event, args))
+
+    def clock_task(self, task):
+        if not self.paused:
+            self.accumulator += globalClock.getDt() * self.speed
+            steps = int(self.accumulator // self.step_time)
+            if steps:
+                self.accumulator -= steps * self.step_time
+                if steps + self.queued > self.max_steps:
+                    # Too far behind to catch up, the game runs slower instead
+                    steps = max(0, self.max_steps - self.queued)
+                    self.accumulator = 0.0
+                if steps and not self.threaded:
+                    self.world.advance(steps)
+                    self.publish()
+                elif steps:
+                    with self.wakeup:
+                        self.pending += steps
+                        self.queued += steps
+                        self.wakeup.notify()
+
+        if self.outbox:
+            with self.wakeup:
+                events, self.outbox = self.outbox, []
+            for event, args in events:
+                messenger.send(event, args)
+        return task.cont
+
+    def run(self, steps):
+        with self.lock:
+            self.world.advance(steps)
+            events, self.events = self.events, []
+            return capture(self.world), events
+
+    def worker(self):
+        while True:
+            with self.wakeup:
+                while not self.pending:
+                    self.wakeup.wait()
+                self.pending -= 1
+            # One step at a time, so the frame sees every state even when
+            # the worker lags behind
+            start = time.perf_counter()
+            state, events = self.run(1)
+            self.world.profiler.record('simulationStep', time.perf_counter() - start)
+            with self.wakeup:
+                self.buffer.publish(state)
+                self.outbox.extend(events)
+                self.queued -= 1
+
+    # Timers
+    # ------
+
+    def after(self, delay, callback):
+        '''Calls callback() once, delay seconds of game time from now'''
+
+        self._push(self.world.sim_time + delay, None, callback)
+
+    def every(self, interval, callback):
+        '''Calls callback() every interval seconds of game time'''
+
+        self._push(self.world.sim_time + interval, interval, callback)
+
+    def rebase(self):
+        # Keeps the timers running when the game time starts over at 0
+        now = self.world.sim_time
+        self.timers = [(timer[0] - now,) + timer[1:] for timer in self.timers]
+        self.accumulator = 0.0
+        with self.wakeup:
+            self.queued -= self.pending
+            self.pending = 0
+
+    def cancel(self, callback):
+        self.timers = [timer for timer in self.timers if timer[3] != callback]
+        heapq.heapify(self.timers)
+
+    def _push(self, due, interval, callback):
+        self.sequence += 1
+        heapq.heappush(self.timers, (due, self.sequence, interval, callback))
+
+    def fire_timers(self):
+        now = self.world.sim_time
+        while self.timers and self.timers[0][0] <= now:
+            due, sequence, interval, callback = heapq.heappop(self.timers)
+            if interval is not None:
+                self._push(due + interval, interval, callback)
+            callback()
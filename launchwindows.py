@@ -0,0 +1,98 @@
+import math
+
+import numpy as np
+
+
+class DistanceTable():
+    '''Distances between two bodies sampled over one synodic cycle, together
+    with a sparse table of the index of the minimum in every range of 2^k
+    samples. Any range minimum is answered from two overlapping entries.'''
+
+    def __init__(self, distances, step):
+        self.distances = distances
+        self.step = step
+        self.levels = [np.arange(len(distances))]
+        k = 1
+        while 2**k <= len(distances):
+            prev = self.levels[-1]
+            left, right = prev[:-2**(k - 1)], prev[2**(k - 1):]
+            self.levels.append(np.where(distances[right] < distances[left], right, left))
+            k += 1
+
+    def __len__(self):
+        return len(self.distances)
+
+    def argmin(self, first, last):
+        '''Index of the smallest distance in samples first to last, inclusive'''
+
+        k = (last - first + 1).bit_length() - 1
+        left = self.levels[k][first]
+        right = self.levels[k][last - 2**k + 1]
+        return right if self.distances[right] < self.distances[left] else left
+
+
+class LaunchWindows():
+    '''Launch window planner on top of the orbit table. For every pair of bodies
+    the distance curve over one synodic cycle gets sampled once, after that the
+    cheapest departure within any time frame is a range minimum query.
+
+    The synodic cycle is taken from the planets the bodies orbit, so for moons
+    the table repeats their first cycle and is off by at most their orbit.'''
+
+    def __init__(self, orbits, resolution=1):
+        self.orbits = orbits
+        self.resolution = resolution    # Longest time between two samples
+        self.tables = {}
+
+    def _root(self, id):
+        while self.orbits.parent[id] >= 0:
+            id = self.orbits.parent[id]
+        return id
+
+    def _rate(self, id):
+        # Turns per second of the planet a body belongs to
+        period = self.orbits.period[self._root(id)]
+        return 1 / period if period > 0 else 0
+
+    def synodic_period(self, body1, body2):
+        id1, id2 = self.orbits.index[body1], self.orbits.index[body2]
+        diff = abs(self._rate(id1) - self._rate(id2))
+        return 1 / diff if diff > 0 else 0
+
+    def table(self, body1, body2):
+        key = tuple(sorted((self.orbits.index[body1], self.orbits.index[body2])))
+        table = self.tables.get(key)
+        if table is None:
+            # The cycle gets divided into whole samples, so sample k of the
+            # table is at time k * step in every cycle
+            period = self.synodic_period(body1, body2)
+            samples = max(1, math.ceil(period / self.resolution))
+            step = period / samples if period > 0 else self.resolution
+            bodies = [self.orbits.bodies[id] for id in key]
+            positions = self.orbits.positions_of(bodies, np.arange(samples) * step)
+            diff = positions[:, 0, :2] - positions[:, 1, :2]
+            table = DistanceTable(np.hypot(diff[:, 0], diff[:, 1]), step)
+            self.tables[key] = table
+        return table
+
+    def cheapest_departure(self, body1, body2, start, duration):
+        '''Returns (departure time, distance) of the shortest connection with a
+        departure between start and start + duration, both in seconds'''
+
+        table = self.table(body1, body2)
+        n = len(table)
+        first = math.ceil(start / table.step)
+        last = max(first, math.floor((start + duration) / table.step))
+
+        if last - first + 1 >= n:
+            best = table.argmin(0, n - 1)
+            index = first + (best - first) % n
+        else:
+            lo, hi = first % n, last % n
+            if lo <= hi:
+                best = table.argmin(lo, hi)
+            else:
+                head, tail = table.argmin(lo, n - 1), table.argmin(0, hi)
+                best = tail if table.distances[tail] < table.distances[head] else head
+            index = first + (best - lo) % n
+        return float(index * table.step), float(table.distances[best])
@@ -0,0 +1,74 @@
+import numpy as np
+
+from star import Star
+
+
+class Ledger():
+    '''System wide totals of population, energy and goods. They get adjusted by
+    every change of the underlying values, so reading them costs the same no
+    matter how many bodies exist. check() recounts everything from scratch
+    to catch changes that bypassed the ledger.'''
+
+    def __init__(self, world):
+        self.world = world
+        self.population = 0
+        self.energy_cap = 0
+        self.energy_usg = 0
+        self.goods = np.zeros(0)    # Total amount per good ID of the economy
+
+    # Updates
+    # -------
+
+    def add_population(self, delta):
+        self.population += delta
+
+    def add_energy(self, cap=0, usg=0):
+        self.energy_cap += int(cap)
+        self.energy_usg += int(usg)
+
+    def add_goods(self, gids, amounts):
+        np.add.at(self.goods, gids, amounts)
+
+    def grow_goods(self, n_goods):
+        self.goods = np.append(self.goods, np.zeros(n_goods - len(self.goods)))
+
+    # Queries
+    # -------
+
+    def income(self):
+        return round(self.population * self.world.tax_factor)
+
+    def energy_balance(self):
+        return self.energy_cap - self.energy_usg
+
+    def goods_total(self, good):
+        gid = self.world.economy.good_ids.get(good)
+        return 0 if gid is None else float(self.goods[gid])
+
+    # Consistency
+    # -----------
+
+    def count(self):
+        # Recounts all totals from the bodies and the economy
+        economy = self.world.economy
+        population = sum(obj.population for obj in self.world.galaxy_objects
+                         if type(obj) != Star)
+        return (population, int(economy.energy_cap.sum()), int(economy.energy_usg.sum()),
+                economy.goods.sum(axis=0))
+
+    def rebuild(self):
+        self.population, self.energy_cap, self.energy_usg, self.goods = self.count()
+
+    def check(self):
+        population, energy_cap, energy_usg, goods = self.count()
+        errors = []
+        if population != self.population:
+            errors.append('population {} != {}'.format(self.population, population))
+        if energy_cap != self.energy_cap:
+            errors.append('energy capacity {} != {}'.format(self.energy_cap, energy_cap))
+        if energy_usg != self.energy_usg:
+            errors.append('energy usage {} != {}'.format(self.energy_usg, energy_usg))
+        if goods.shape != self.goods.shape or not np.allclose(goods, self.goods):
+            errors.append('goods {} != {}'.format(self.goods, goods))
+        if errors:
+            raise AssertionError('Ledger out of sync: ' + ', '.join(errors))
@@ -0,0 +1,109 @@
+import heapq
+from collections.abc import Mapping
+
+
+class Mission():
+    '''Handle of one scheduled mission. It completes at the game time 'due',
+    its countdown is derived from that whenever it gets read.'''
+
+    __slots__ = ('scheduler', 'id', 'kind', 'planet', 'message_id', 'launched', 'due', 'state')
+
+    def __init__(self, scheduler, id, kind, planet, launched, due):
+        self.scheduler = scheduler
+        self.id = id
+        self.kind = kind
+        self.planet = planet
+        self.message_id = '{}{}{}'.format(kind, planet.name, id)
+        self.launched = launched
+        self.due = due
+        self.state = 'active'   # 'active', 'completed' or 'cancelled'
+
+    def remaining(self):
+        # Seconds of game time left, counting down to 0 on the last second
+        return max(0, self.due - 1 - self.scheduler.world.sim_time)
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+    def __repr__(self):
+        return 'Mission({}, {!r}, {}, due={}, {})'.format(
+            self.id, self.kind, self.planet.name, self.due, self.state)
+
+
+class MissionMessage(Mapping):
+    '''Planet message of a running mission, its value is the countdown'''
+
+    TITLES = {'probe': 'Probing Mission', 'colonise': 'Colonise Mission'}
+
+    def __init__(self, mission):
+        self.mission = mission
+
+    def __getitem__(self, key):
+        if key == 'type':
+            return 'info'
+        if key == 'text':
+            return self.TITLES[self.mission.kind]
+        if key == 'value':
+            return self.mission.remaining()
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('type', 'text', 'value'))
+
+    def __len__(self):
+        return 3
+
+
+class MissionScheduler():
+    '''Running missions in a heap ordered by completion time. Nothing happens
+    between completions, advance() only looks at the head of the heap.
+    Cancelled missions stay in the heap and get dropped once they come up.'''
+
+    def __init__(self, world):
+        self.world = world
+        self.clear()
+
+    def clear(self):
+        self.heap = []
+        self.missions = {}      # Mission id -> handle of every active mission
+        self.next_id = 1
+
+    def schedule(self, kind, planet, time):
+        now = self.world.sim_time
+        return self.restore(self.next_id, kind, planet, now, now + time + 1)
+
+    def restore(self, id, kind, planet, launched, due):
+        mission = Mission(self, id, kind, planet, launched, due)
+        self.next_id = max(self.next_id, id + 1)
+        self.missions[id] = mission
+        heapq.heappush(self.heap, (due, id, mission))
+        planet.messages[mission.message_id] = MissionMessage(mission)
+        self.world.economy.mark_dirty(planet)
+        return mission
+
+    def cancel(self, mission):
+        if mission.state != 'active':
+            return
+        mission.state = 'cancelled'
+        del self.missions[mission.id]
+        self.world.remove_message(mission.planet, mission.message_id)
+
+    def advance(self, now):
+        while self.heap and self.heap[0][0] <= now:
+            due, id, mission = heapq.heappop(self.heap)
+            if mission.state == 'active':
+                mission.state = 'completed'
+                del self.missions[id]
+                self.world.complete_mission(mission)
+
+    def get(self, id):
+        return self.missions.get(id)
+
+    def on(self, planet):
+        return [mission for mission in self.missions.values() if mission.planet is planet]
+
+    def __iter__(self):
+        return iter(sorted(self.missions.values(), key=lambda mission: mission.id))
+
+    def __len__(self):
+        return len(self.missions)
@@ -0,0 +1,101 @@
+import numpy as np
+
+
+class Orbits():
+    '''Closed form positions of all bodies of the system. Every body moves on a
+    circle around its parent (or the origin) with a fixed radius, period and
+    starting phase, so the position at any game time t can be computed directly
+    without a scene graph. All queries accept a single time or an array of
+    times and are vectorized over all bodies.'''
+
+    def __init__(self):
+        self.bodies = []
+        self.index = {}
+        self.parent = np.empty(0, np.int32)
+        self.radius = np.empty(0)
+        self.period = np.empty(0)
+        self.phase = np.empty(0)
+        self.day = np.empty(0)
+        self.levels = []    # Body indices per depth, parents before children
+
+    def add(self, body, parent=None, radius=0, period=0, phase=0, day=0):
+        '''Registers a body orbiting parent (a registered body or None for the
+        origin). Periods are in seconds of game time, phase in degrees.'''
+
+        id = len(self.bodies)
+        parent_id = -1 if parent is None else self.index[parent]
+        self.bodies.append(body)
+        self.index[body] = id
+        self.parent = np.append(self.parent, np.int32(parent_id))
+        self.radius = np.append(self.radius, radius)
+        self.period = np.append(self.period, period)
+        self.phase = np.append(self.phase, phase)
+        self.day = np.append(self.day, day)
+
+        depth = 0
+        while parent_id >= 0:
+            parent_id = self.parent[parent_id]
+            depth += 1
+        if depth == len(self.levels):
+            self.levels.append([])
+        self.levels[depth].append(id)
+        return id
+
+    def _turns(self, t, period, phase):
+        t = np.asarray(t, float)[..., None]
+        turns = np.divide(t, period, out=np.zeros(t.shape[:-1] + period.shape),
+                          where=period > 0)
+        return np.degrees(2 * np.pi * turns) + phase
+
+    def angles(self, t):
+        '''Heading of the orbit of every body in degrees. Orbits of moons turn
+        together with the orbit of their parent.'''
+
+        angles = self._turns(t, self.period, self.phase)
+        for level in self.levels[1:]:
+            angles[..., level] += angles[..., self.parent[level]]
+        return angles
+
+    def positions(self, t):
+        '''World positions of all bodies at time t, shaped (..., bodies, 3)'''
+
+        angles = np.radians(self.angles(t))
+        offsets = np.zeros(angles.shape + (3,))
+        offsets[..., 0] = self.radius * np.cos(angles)
+        offsets[..., 1] = self.radius * np.sin(angles)
+        for level in self.levels[1:]:
+            offsets[..., level, :] += offsets[..., self.parent[level], :]
+        return offsets
+
+    def positions_of(self, bodies, t):
+        '''World positions of only the given bodies at time t, shaped
+        (..., len(bodies), 3). Costs as much as their chains of parents.'''
+
+        positions = []
+        for body in bodies:
+            chain, id = [], self.index[body]
+            while id >= 0:
+                chain.insert(0, id)
+                id = self.parent[id]
+            angles = np.radians(np.cumsum(
+                self._turns(t, self.period[chain], self.phase[chain]), axis=-1))
+            radius = self.radius[chain]
+            positions.append(np.stack([(radius * np.cos(angles)).sum(axis=-1),
+                                       (radius * np.sin(angles)).sum(axis=-1),
+                                       np.zeros(angles.shape[:-1])], axis=-1))
+        return np.stack(positions, axis=-2)
+
+    def position(self, body, t):
+        return self.positions_of([body], t)[..., 0, :]
+
+    def spins(self, t):
+        '''Heading of every body around its own axis in degrees'''
+
+        return self._turns(t, self.day, 0) % 360
+
+    def update(self, t):
+        # Moves all models to their place at time t in a single pass
+        positions = self.positions(t)
+        spins = self.spins(t)
+        for body, pos, h in zip(self.bodies, positions.tolist(), spins.tolist()):
+            body.model.setPosHpr(pos[0], pos[1], pos[2], h, 0, 0)
@@ -0,0 +1,55 @@
+from panda3d.core import *
+
+import numpy as np
+
+
+class Picker():
+    '''Finds the body under the mouse by intersecting the mouse ray with the
+    bounding spheres of all bodies at once. Centers come from the orbit table
+    and radii from the scale of the bodies, so no collision traversal of the
+    scene graph is needed and picking is cheap enough to run every frame.'''
+
+    def __init__(self, world, model_radius=1):
+        self.world = world
+        self.model_radius = model_radius    # Radius of the unscaled sphere model
+
+    def radii(self):
+        return np.array([body.scale for body in self.world.orbits.bodies]) * (
+            self.world.sizescale * self.model_radius)
+
+    def ray(self, mpos):
+        '''Origin and normalized direction of the camera ray through a point of
+        the screen, in render space'''
+
+        near, far = Point3(), Point3()
+        base.camLens.extrude(mpos, near, far)
+        near = render.getRelativePoint(base.cam, near)
+        far = render.getRelativePoint(base.cam, far)
+        origin = np.array(near)
+        direction = np.array(far) - origin
+        return origin, direction / np.linalg.norm(direction)
+
+    def pick(self, mpos):
+        '''Closest body hit by the ray through mpos, or None'''
+
+        origin, direction = self.ray(mpos)
+        centers = self.world.orbits.positions(self.world.orbit_time())
+        radii = self.radii()
+
+        to_center = centers - origin
+        along = to_center @ direction
+        miss_sq = np.einsum('ij,ij->i', to_center, to_center) - along**2
+        half_chord = np.sqrt(np.maximum(radii**2 - miss_sq, 0))
+        hit = (miss_sq <= radii**2) & (along + half_chord >= 0)
+        if not hit.any():
+            return None
+
+        entry = np.where(hit, np.maximum(along - half_chord, 0), np.inf)
+        return self.world.orbits.bodies[int(np.argmin(entry))]
+
+    def pick_mouse(self):
+        # Offscreen windows have no mouse at all
+        watcher = base.mouseWatcherNode
+        if watcher is not None and watcher.hasMouse():
+            return self.pick(watcher.getMouse())
+        return None
@@ -1,5 +1,7 @@
 from panda3d.core import *
 
+from economy import PlanetGoods
+
 
 class Planet():
     def __init__(self, world, name, model_path, texture, orbit_root,
@@ -12,6 +14,9 @@ class Planet():
         self.athmosphere = athmosphere
         self.wind = wind
         self.rescources = rescources
+        self.eco_id = world.economy.register_planet(self)
+        self._goods = PlanetGoods(world.economy, self.eco_id)
+        self._population = 0
 
         self.energy_cap = 0
         self.energy_usg = 0
@@ -29,9 +34,10 @@ class Planet():
             'HAB': {'1': None, '2': None, '3': None, '4': None, '5': None}
         }
 
-        self.model = loader.loadModel(model_path)
-        self.model.setTexture(loader.loadTexture(texture), 1)
-        self.model.reparentTo(orbit_root)
+        self.model = orbit_root.attachNewNode(name)
+        if not world.headless:
+            world.assets.request_model(model_path, self.model)
+            world.assets.request_texture(texture, self.model)
         self.model.setPos(distance * world.orbitscale, 0, 0)
         self.model.setScale(scale * world.sizescale)
         self.model.setTag('clickable', 'yes')
@@ -39,8 +45,48 @@ class Planet():
 
         world.galaxy_objects.append(self)
 
-    def getPos(self):
-        return self.model.getPos(base.render)
+    @property
+    def goods(self):
+        return self._goods
+
+    @goods.setter
+    def goods(self, goods):
+        self.world.economy.set_goods(self.eco_id, goods)
+
+    @property
+    def energy_cap(self):
+        return int(self.world.economy.energy_cap[self.eco_id])
+
+    @energy_cap.setter
+    def energy_cap(self, value):
+        self.world.ledger.add_energy(cap=value - self.energy_cap)
+        self.world.economy.energy_cap[self.eco_id] = value
+        self.world.economy.dirty[self.eco_id] = True
+
+    @property
+    def energy_usg(self):
+        return int(self.world.economy.energy_usg[self.eco_id])
+
+    @energy_usg.setter
+    def energy_usg(self, value):
+        self.world.ledger.add_energy(usg=value - self.energy_usg)
+        self.world.economy.energy_usg[self.eco_id] = value
+        self.world.economy.dirty[self.eco_id] = True
+
+    @property
+    def population(self):
+        return self._population
+
+    @population.setter
+    def population(self, value):
+        self.world.ledger.add_population(value - self._population)
+        self._population = value
+
+    def getPos(self, t=None):
+        # Position at game time t, by default right now
+        if t is None:
+            t = self.world.orbit_time()
+        return Point3(*self.world.orbits.position(self, t))
 
     def reset(self):
         self.energy_cap = 0
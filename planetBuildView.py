@@ -1,19 +1,23 @@
+from direct.showbase.DirectObject import DirectObject
 from direct.gui.DirectGui import *
 from direct.interval.IntervalGlobal import *
 from panda3d.core import *
 
+from bindings import Bindings
 from scrolleditemselector import ScrolledItemSelector
 
 
-class PlanetBuildView():
+class PlanetBuildView(DirectObject):
     def __init__(self, world):
         self.world = world
         self.obj = None
+        self.watched_event = None
         self.ActiveBuildSection = 'RES'
         self.ActiveBuildingName = None
         self.ActiveBuildSlot = [None]
         self.PlanetBuildPanelContent = []
         self.PlanetBuildSlotButtons = []
+        self.quickinfo_bindings = Bindings(world.scheduler, 'quickinfo')
 
         self.create_gui()
 
@@ -24,6 +28,11 @@ class PlanetBuildView():
         self.check_construct_button()
         self.check_salvage_and_info()
         self.update_slots()
+        self.watch_buildings()
+
+    def state(self):
+        # Changing values of the object, from the snapshot of the game clock
+        return self.world.clock.snapshot.bodies[self.obj.name]
 
     def show(self):
         self.PlanetBuildPanel.show()
@@ -34,6 +43,7 @@ class PlanetBuildView():
         self.PlanetBuildQuickInfo.show()
 
     def hide(self):
+        self.unwatch_buildings()
         self.PlanetBuildPanel.hide()
         self.PlanetBuildDescriptionField.hide()
         self.PlanetBuildCloseButton.hide()
@@ -43,16 +53,16 @@ class PlanetBuildView():
 
     def fill(self):
         section = self.ActiveBuildSection
-        for k, v in self.world.BuildingsDB[section].items():
+        for bp in self.world.catalog.in_section(section):
             self.PlanetBuildPanel.add_item(
-                image=v['img'],
+                image=bp.img,
                 image_pos=(-0.3, 0, 0),
                 image_scale=(0.12),
-                title=k,
+                title=bp.name,
                 title_pos=(-0.13, 0, 0.05),
-                text='Price: ' + str(v['price']),
+                text='Price: ' + str(bp.price),
                 text_pos=(-0.13, 0, -0.05),
-                value=k)
+                value=bp.name)
 
     def clear(self):
         self.PlanetBuildPanel.clear()
@@ -79,6 +89,7 @@ class PlanetBuildView():
             self.check_construct_button()
             self.check_salvage_and_info()
             self.ActiveBuildSection = section
+            self.watch_buildings()
 
             pos = (0.15, 0, 0)
             swipeOutInterval = self.PlanetBuildSlotContainer.posInterval(
@@ -96,12 +107,11 @@ class PlanetBuildView():
         self.check_salvage_and_info()
 
     def switch_build_blueprint(self):
-        section = self.ActiveBuildSection
         building_name = self.PlanetBuildPanel.get_active_value()
-        building = self.world.BuildingsDB[section][building_name]
-        self.PlanetBuildDescriptionText['text'] = (building['desc'] + '\n\n'
-                                                   'Requires: ' + building['reqText'] + '\n\n'
-                                                   'Yields: ' + building['yieldText'])
+        building = self.world.catalog[building_name]
+        self.PlanetBuildDescriptionText['text'] = (building.desc + '\n\n'
+                                                   'Requires: ' + building.req_text + '\n\n'
+                                                   'Yields: ' + building.yield_text)
 
         self.ActiveBuildingName = building_name
         self.check_construct_button()
@@ -112,7 +122,7 @@ class PlanetBuildView():
         construction_possible = (
             self.ActiveBuildingName is not None
             and self.ActiveBuildSlot[0] is not None
-            and self.obj.slots[section][self.ActiveBuildSlot[0]] is None
+            and self.state().slots[section][self.ActiveBuildSlot[0]] is None
         )
 
         if construction_possible:
@@ -127,7 +137,7 @@ class PlanetBuildView():
         section = self.ActiveBuildSection
         slot = self.ActiveBuildSlot[0]
 
-        if self.ActiveBuildSlot[0] is not None and self.obj.slots[section][slot] is not None:
+        if self.ActiveBuildSlot[0] is not None and self.state().slots[section][slot] is not None:
             self.PlanetBuildSalvageButton['state'] = 'normal'
             self.PlanetBuildSalvageButton['text_fg'] = (1, 0.9, 0.9, 1)
             self.PlanetBuildSlotInfo.show()
@@ -139,314 +149,116 @@ class PlanetBuildView():
 
     def fill_slot_info(self, planet, section, slot):
         if None not in (planet, section, slot):
-            DBslot = self.obj.slots[section][slot]
+            building = self.state().slots[section][slot]
 
-            if DBslot['problemText'] == '':
-                problemText = DBslot['name'] + ' is running as intended'
+            if building.problem_text == '':
+                problemText = building.name + ' is running as intended'
             else:
-                problemText = DBslot['problemText']
+                problemText = building.problem_text
 
             self.PlanetBuildSlotInfoText['text'] = problemText
 
     def construct_building(self):
-        planet = self.obj
-        section = self.ActiveBuildSection
-        slot = self.ActiveBuildSlot[0]
-        b_name = self.ActiveBuildingName
-        b_data = self.world.BuildingsDB[section][b_name]
-
-        getsBuild = False
-        add_PRO_task = False
-        add_RES_task = False
-        add_consume_task = False
-
-        if self.world.money >= b_data['price']:
-            if section == 'ENR':
-                getsBuild = True
-                self.obj.energy_cap += b_data['incVal']
-                if b_name == 'Coal Generator' or b_name == 'Nuclear Reactor':
-                    add_consume_task = True
-            else:
-                if self.obj.energy_usg + b_data['enrDrain'] <= self.obj.energy_cap:
-                    if section == 'RES':
-                        if b_data['req'] == 'Athmosphere':
-                            if self.obj.athmosphere:
-                                getsBuild = True
-                                add_RES_task = True
-                                self.obj.energy_usg += b_data['enrDrain']
-                            else:
-                                self.world.create_dialog('No Athmosphere present')
-                        elif b_data['req'] in self.obj.rescources:
-                            getsBuild = True
-                            add_RES_task = True
-                            self.obj.energy_usg += b_data['enrDrain']
-                        else:
-                            self.world.create_dialog('Needed Rescource is not available')
-                    elif section == 'PRO':
-                        getsBuild = True
-                        add_PRO_task = True
-                        self.obj.energy_usg += b_data['enrDrain']
-                    elif section == 'HAB':
-                        getsBuild = True
-                        self.obj.habitation_cap += b_data['incVal']
-                        self.obj.energy_usg += b_data['enrDrain']
-                    elif section == 'DEV':
-                        getsBuild = True
-                        self.obj.energy_usg += b_data['enrDrain']
-                else:
-                    self.world.create_dialog('Not sufficient Energy')
-        else:
-            self.world.create_dialog('Not enough Money')
-
-        if getsBuild:
-            self.obj.slots[section][slot] = {
-                'name': b_name,
-                'gotProblem': False,
-                'problemText': '',
-                'workers': 0,
-                'output': 0
-            }
-            self.world.money -= b_data['price']
-            self.update_slots()
+        problem = self.world.execute(
+            'construct', self.obj.name, self.ActiveBuildSection,
+            self.ActiveBuildSlot[0], self.ActiveBuildingName)
 
-        if add_RES_task:
-            good = b_data['yield']
-            incVal = b_data['incVal']
-            purity = planet.rescources[b_data['req']]
-            p_factor = 1
-            if purity == 'Common':
-                p_factor = 2
-            elif purity == 'Rare':
-                p_factor = 0.5
-
-            taskMgr.doMethodLater(
-                3, self.extract_rescource_task, b_name + slot,
-                extraArgs=[planet, section, slot, good, incVal, p_factor],
-                appendTask=True)
-
-        if add_PRO_task:
-            inGood = b_data['req']
-            outGood = b_data['yield']
-            incVal = b_data['incVal']
-            decVal = b_data['decVal']
-            taskMgr.doMethodLater(
-                3, self.process_good_task, b_name + slot,
-                extraArgs=[planet, section, slot, inGood, outGood, incVal, decVal],
-                appendTask=True)
-
-        if add_consume_task:
-            good = b_data['req']
-            decVal = b_data['decVal']
-            incVal = b_data['incVal']
-            taskMgr.doMethodLater(
-                3, self.consume_good_task, b_name + slot,
-                extraArgs=[planet, section, slot, good, decVal, incVal],
-                appendTask=True)
+        if problem is None:
+            self.update_slots()
+        else:
+            self.world.create_dialog(problem)
 
         self.check_construct_button()
         self.check_salvage_and_info()
 
     def salvage_building(self):
-        slot = self.ActiveBuildSlot[0]
-        section = self.ActiveBuildSection
-        blueprint = self.obj.slots[section][slot]['name']
-        price = self.world.BuildingsDB[section][blueprint]['price']
-        incVal = self.world.BuildingsDB[section][blueprint]['incVal']
-        enrDrain = self.world.BuildingsDB[section][blueprint]['enrDrain']
-
-        getsSalvaged = True
-
-        if section == 'ENR':
-            if (self.obj.energy_cap - incVal) < self.obj.energy_usg:
-                self.world.create_dialog('Energy too low if salvaged')
-                getsSalvaged = False
-            else:
-                self.obj.energy_cap -= incVal
+        problem = self.world.execute(
+            'salvage', self.obj.name, self.ActiveBuildSection, self.ActiveBuildSlot[0])
 
-        if getsSalvaged:
-            self.obj.slots[section][slot] = None
-            self.obj.energy_usg -= enrDrain
-            self.world.money += round(price * self.world.salvage_factor)
+        if problem is None:
             self.update_slots()
-
-            taskMgr.remove(blueprint + slot)
             self.check_salvage_and_info()
             self.check_construct_button()
-
-            self.world.remove_message(self.obj, section + slot)
+        else:
+            self.world.create_dialog(problem)
 
     def update_slots(self):
-        section = self.ActiveBuildSection
-        data = self.obj.slots[section]
-        fl = section[0]
+        for ctr in range(len(self.PlanetBuildSlotButtons)):
+            self.update_slot(str(ctr + 1))
 
-        ctr = 0
-        for button in self.PlanetBuildSlotButtons:
-            buttonLabel = self.PlanetBuildSlotLabels[ctr]
-
-            if data[str(ctr + 1)] is not None:
-                buttonLabel['text'] = data[str(ctr + 1)]['name']
-                if data[str(ctr + 1)]['gotProblem']:
-                    buttonLabel['text'] += '\n/!\\PROBLEM/!\\'
-            else:
-                buttonLabel['text'] = ''
-            button['text'] = fl + str(ctr + 1)
-            ctr += 1
-
-    def refresh_quickinfo_task(self, planet, task):
-        athm = planet.athmosphere
-        wind = planet.wind
-        enrgUsg = planet.energy_usg
-        enrgCap = planet.energy_cap
-        pop = planet.population
-        habCap = planet.habitation_cap
-
-        self.PlanetBuildQuickText1['text'] = (
-            'ATHM: {} - WIND: {} - ENR: {}/{} - POP: {}/{}'.format(
-                athm, wind, enrgUsg, enrgCap, pop, habCap
-            )
-        )
-
-        self.PlanetBuildQuickText2['text'] = 'RES: '
-        for k, v in planet.rescources.items():
-            self.PlanetBuildQuickText2['text'] += k + ', '
-
-        self.PlanetBuildQuickText3['text'] = 'GOODS: '
-        if planet.goods:
-            for k, v in planet.goods.items():
-                self.PlanetBuildQuickText3['text'] += str(v) + ' ' + k + ' - '
-        return task.cont
-
-    def extract_rescource_task(self, planet, section, slot, good, incVal, p_factor, task):
-        m_id = section + slot
-        b_name = planet.slots[section][slot]['name']
-
-        if not (good in planet.goods):
-            planet.goods.update({good: 0})
-
-        if planet.energy_cap < planet.energy_usg:
-            if not planet.slots[section][slot]['gotProblem']:
-                problem = 'Not enough energy to continue extraction'
-                planet.slots[section][slot]['gotProblem'] = True
-                planet.slots[section][slot]['problemText'] = problem
-                self.update_slots()
-                self.fill_slot_info(planet, section, slot)
-                self.world.add_message(planet, m_id, 'problem', b_name, 'Energy too low')
-        elif planet.goods[good] >= self.world.goods_cap:
-            if not planet.slots[section][slot]['gotProblem']:
-                problem = 'Storage is full'
-                planet.slots[section][slot]['gotProblem'] = True
-                planet.slots[section][slot]['problemText'] = problem
-                self.update_slots()
-                self.fill_slot_info(planet, section, slot)
-                self.world.add_message(planet, m_id, 'problem', b_name, 'Storage full')
-        else:
-            if planet.slots[section][slot]['gotProblem']:
-                planet.slots[section][slot]['gotProblem'] = False
-                planet.slots[section][slot]['problemText'] = ''
-                self.update_slots()
-                self.fill_slot_info(planet, section, slot)
-                self.world.remove_message(planet, m_id)
-
-            planet.goods[good] += incVal * p_factor
-
-        return task.again
-
-    def process_good_task(self, planet, section, slot, inGood, outGood, incVal, decVal, task):
-        m_id = section + slot
-        b_name = planet.slots[section][slot]['name']
-
-        if not (outGood in planet.goods):
-            planet.goods.update({outGood: 0})
-
-        if not (inGood in planet.goods) or planet.goods[inGood] < decVal:
-            if not planet.slots[section][slot]['gotProblem']:
-                problem = 'Missing {} to continue production'.format(inGood)
-                planet.slots[section][slot]['gotProblem'] = True
-                planet.slots[section][slot]['problemText'] = problem
-                self.update_slots()
-                self.fill_slot_info(planet, section, slot)
-                self.world.add_message(planet, m_id, 'problem', b_name, 'Missing goods')
-        elif planet.energy_cap < planet.energy_usg:
-            if not planet.slots[section][slot]['gotProblem']:
-                problem = 'Not enough energy to continue production'
-                planet.slots[section][slot]['gotProblem'] = True
-                planet.slots[section][slot]['problemText'] = problem
-                self.update_slots()
-                self.fill_slot_info(planet, section, slot)
-                self.world.add_message(planet, m_id, 'problem', b_name, 'Energy too low')
-        elif planet.goods[outGood] >= self.world.goods_cap:
-            if not planet.slots[section][slot]['gotProblem']:
-                problem = 'Storage is full'
-                planet.slots[section][slot]['gotProblem'] = True
-                planet.slots[section][slot]['problemText'] = problem
-                self.update_slots()
-                self.fill_slot_info(planet, section, slot)
-                self.world.add_message(planet, m_id, 'problem', b_name, 'Storage full')
-        else:
-            if planet.slots[section][slot]['gotProblem']:
-                planet.slots[section][slot]['gotProblem'] = False
-                planet.slots[section][slot]['problemText'] = ''
-                self.update_slots()
-                self.fill_slot_info(planet, section, slot)
-                self.world.remove_message(planet, m_id)
-
-            planet.goods[inGood] -= decVal
-            if not (outGood in planet.goods):
-                planet.goods.update({outGood: 0})
-            planet.goods[outGood] += incVal
-
-        return task.again
-
-    def consume_good_task(self, planet, section, slot, good, decVal, incVal, task):
-        m_id = section + slot
-        b_name = planet.slots[section][slot]['name']
-
-        if not (good in planet.goods) or planet.goods[good] < decVal:
-            if not planet.slots[section][slot]['gotProblem']:
-                problem = 'Missing {} to continue service'.format(good)
-                planet.slots[section][slot]['gotProblem'] = True
-                planet.slots[section][slot]['problemText'] = problem
-                self.update_slots()
-                self.fill_slot_info(planet, section, slot)
-                self.world.add_message(planet, m_id, 'problem', b_name, 'Missing goods')
-                if section == 'ENR':
-                    planet.energy_cap -= incVal
+    def update_slot(self, slot):
+        section = self.ActiveBuildSection
+        building = self.state().slots[section][slot]
+        button = self.PlanetBuildSlotButtons[int(slot) - 1]
+        buttonLabel = self.PlanetBuildSlotLabels[int(slot) - 1]
+
+        if building is not None:
+            buttonLabel['text'] = building.name
+            if building.problem_text:
+                buttonLabel['text'] += '\n/!\\PROBLEM/!\\'
         else:
-            if planet.slots[section][slot]['gotProblem']:
-                planet.slots[section][slot]['gotProblem'] = False
-                planet.slots[section][slot]['problemText'] = ''
-                self.update_slots()
-                self.fill_slot_info(planet, section, slot)
-                self.world.remove_message(planet, m_id)
-                if section == 'ENR':
-                    planet.energy_cap += incVal
-            planet.goods[good] -= decVal
-
-        return task.again
+            buttonLabel['text'] = ''
+        button['text'] = section[0] + slot
+
+    def watch_buildings(self):
+        # Listens only to state changes of the buildings on screen, i.e. of
+        # the active section of the shown planet
+        self.unwatch_buildings()
+        self.watched_event = self.world.economy.change_event(self.obj, self.ActiveBuildSection)
+        self.accept(self.watched_event, self.on_building_changed)
+
+    def unwatch_buildings(self):
+        if self.watched_event is not None:
+            self.ignore(self.watched_event)
+            self.watched_event = None
+
+    def on_building_changed(self, slot):
+        self.update_slot(slot)
+        if slot == self.ActiveBuildSlot[0]:
+            self.fill_slot_info(self.obj, self.ActiveBuildSection, slot)
+
+    def bind_quickinfo(self, planet):
+        # Changing values come from the snapshot of the game clock
+        def state():
+            return self.world.clock.snapshot.bodies[planet.name]
+
+        def values():
+            body = state()
+            return (planet.athmosphere, planet.wind, body.energy_usg, body.energy_cap,
+                    body.population, body.habitation_cap)
+
+        self.quickinfo_bindings.clear()
+        self.quickinfo_bindings.bind(
+            self.PlanetBuildQuickText1, values,
+            'ATHM: {} - WIND: {} - ENR: {}/{} - POP: {}/{}'.format)
+        self.quickinfo_bindings.bind(
+            self.PlanetBuildQuickText2,
+            lambda: tuple(planet.rescources),
+            lambda *rescources: 'RES: ' + ''.join(k + ', ' for k in rescources))
+        self.quickinfo_bindings.bind(
+            self.PlanetBuildQuickText3,
+            lambda: state().goods,
+            lambda *goods: 'GOODS: ' + ''.join(str(v) + ' ' + k + ' - ' for k, v in goods))
+
+    def unbind_quickinfo(self):
+        self.quickinfo_bindings.clear()
 
     def create_gui(self):
 
         # Main build panel, description field and construct/salvage buttons
         # -----------------------------------------------------------------
-        self.build_panel_map = loader.loadModel(
-            'models/gui/panels/blueprintlist_maps.egg').find('**/blueprintlist')
-        self.build_description_map = loader.loadModel(
-            'models/gui/panels/blueprintdescription_maps.egg').find('**/blueprintdescription')
-
-        build_button_model = loader.loadModel('models/gui/buttons/build/build_buttons.egg')
-        self.build_button_maps = (
-            build_button_model.find('**/normal'), build_button_model.find('**/active'),
-            build_button_model.find('**/normal'), build_button_model.find('**/disabled'))
+        assets = self.world.assets
+        self.build_panel_map = assets.find(
+            'models/gui/panels/blueprintlist_maps.egg', '**/blueprintlist')
+        self.build_description_map = assets.find(
+            'models/gui/panels/blueprintdescription_maps.egg', '**/blueprintdescription')
 
-        salvage_button_model = loader.loadModel('models/gui/buttons/salvage/salvage_buttons.egg')
-        self.salvage_button_maps = (
-            salvage_button_model.find('**/normal'), salvage_button_model.find('**/active'),
-            salvage_button_model.find('**/normal'), salvage_button_model.find('**/disabled'))
+        self.build_button_maps = assets.find_maps('models/gui/buttons/build/build_buttons.egg')
+        self.salvage_button_maps = assets.find_maps('models/gui/buttons/salvage/salvage_buttons.egg')
 
         self.PlanetBuildPanel = ScrolledItemSelector(
             frame_size=(0.87, 1.2), frame_color=(0.2, 0.2, 0.2, 1), pos=(-1.33, 0, -0.06),
-            command=self.switch_build_blueprint)
+            command=self.switch_build_blueprint, virtual=True, assets=assets)
         self.PlanetBuildPanel.hide()
 
         self.PlanetBuildDescriptionField = DirectFrame(
@@ -518,9 +330,7 @@ class PlanetBuildView():
 
         # Buttons and labels for the planet build slots
         # ----------------------------------------------
-        slot_model = loader.loadModel('models/gui/slots/simple_slot_maps.egg')
-        slot_maps = (slot_model.find('**/normal'), slot_model.find('**/active'),
-                     slot_model.find('**/normal'), slot_model.find('**/disabled'))
+        slot_maps = assets.find_maps('models/gui/slots/simple_slot_maps.egg')
 
         self.PlanetBuildSlotContainer = DirectFrame(pos=(0.15, 0, 0), frameColor=(0.5, 0.5, 0.5, 1))
         self.PlanetBuildSlotContainer.hide()
@@ -14,7 +14,10 @@ class PlanetInfoView():
         self.planetData = None
         self.followObjectScale = None
         self.NewPlanetBuildView = None
-        self.messagesDict = {}
+        self.messagesDict = {}  # Message id -> panel currently showing it
+        self.messageState = {}  # Message id -> (position, text) of that panel
+        self.messagePool = []   # Hidden panels ready for reuse
+        self.launch_window_days = 30
 
         self.create_gui()
 
@@ -27,16 +30,20 @@ class PlanetInfoView():
         self.NewPlanetBuildView = self.world.NewPlanetBuildView
 
         self.fill()
-        taskMgr.doMethodLater(1, self.update_view_task, 'updatePlanetInfoTask')
+        self.world.scheduler.every(1, self.update_view, 'updatePlanetInfo', priority=2)
         self.check_buttons()
         self.load_messages()
 
+    def state(self):
+        # Changing values of the object, from the snapshot of the game clock
+        return self.world.clock.snapshot.bodies[self.obj.name]
+
     def fill(self):
         # Fills the content of the planet info gui every time a planet gets selected
 
         self.PlanetInfoTitle['text'] = self.obj.name
 
-        if type(self.obj) == Star or self.obj.probed:
+        if type(self.obj) == Star or self.state().probed:
             PlanetInfoAttributesText = (
                 'Type:\t\t' + str(type(self.obj).__name__) + '\n'
                 'Diameter:\t\t' + str(self.obj.scale * 10**5) + '\n')
@@ -55,31 +62,30 @@ class PlanetInfoView():
 
                 self.planet_info_rescource_table['text'] = PlanetInfoRescourceText
 
-                if self.obj.goods:
+                state = self.state()
+                if state.goods:
                     planet_info_goods_text = 'Goods:\n'
-                    for k, v in self.obj.goods.items():
+                    for k, v in state.goods:
                         planet_info_goods_text += k + ':\t' + str(v) + '\n'
 
                     self.planet_info_goods_table['text'] = planet_info_goods_text
 
                 self.planet_info_ENR_table['text'] = (
-                    'Energy capacity:\t' + str(self.obj.energy_cap) + '\n'
-                    'Energy usage:\t' + str(self.obj.energy_usg) + '\n\n'
+                    'Energy capacity:\t' + str(state.energy_cap) + '\n'
+                    'Energy usage:\t' + str(state.energy_usg) + '\n\n'
 
-                    'Habitation capacity:\t' + str(self.obj.habitation_cap) + '\n'
-                    'Population count:\t' + str(self.obj.population) + '\n\n'
+                    'Habitation capacity:\t' + str(state.habitation_cap) + '\n'
+                    'Population count:\t' + str(state.population) + '\n\n'
 
                     'Per Capita GDP:\t' + str(self.world.tax_factor)
                 )
         else:
             self.PlanetInfoAttributesTable['text'] = '???'
 
-    def update_view_task(self, task):
+    def update_view(self):
         self.fill()
         self.check_buttons()
-        self.empty_messages()
         self.load_messages()
-        return task.again
 
     def clear(self):
         self.PlanetInfoTitle['text'] = 'Unknown'
@@ -103,11 +109,12 @@ class PlanetInfoView():
             self.PlanetInfoProbeButton.hide()
             return
 
-        if self.obj.colonised:
+        state = self.state()
+        if state.colonised:
             self.PlanetInfoBuildButton.show()
             self.PlanetInfoColoniseButton.hide()
             self.PlanetInfoProbeButton.hide()
-        elif self.obj.probed:
+        elif state.probed:
             self.PlanetInfoBuildButton.hide()
             self.PlanetInfoColoniseButton.show()
             self.PlanetInfoProbeButton.hide()
@@ -117,93 +124,98 @@ class PlanetInfoView():
             self.PlanetInfoProbeButton.show()
 
     def load_messages(self):
+        # Brings the message panels in line with the messages of the object.
+        # Panels are only touched where a message was added, removed, moved
+        # or changed its value, and are recycled through a pool.
+        messages = ()
         if type(self.obj) != Star:
-            if len(self.obj.messages) > 0:
-                self.message_panel_bg_text.hide()
-                i = 0
-                for id, message in self.obj.messages.items():
-                    mText = message['text'] + '\n' + str(message['value'])
-
-                    msgPanel = DirectFrame(
-                        pos=(0, 0, 0.35 - i * 0.21), frameColor=(0.2, 0.2, 0.3, 0.2), frameSize=(-0.2, 0.2, -0.1, 0.1),
-                        text=mText, text_pos=(0, 0.05), text_scale=0.05, text_fg=(1, 1, 1, 1), text_wordwrap=8,
-                        parent=self.PlanetInfoMessagePanel)
-
-                    self.messagesDict.update({id: msgPanel})
-                    i += 1
+            messages = self.state().messages
+
+        ids = {id for id, text, value in messages}
+        for id in list(self.messagesDict):
+            if id not in ids:
+                self.release_message_panel(id)
+
+        for i, (id, text, value) in enumerate(messages):
+            mText = text + '\n' + str(value)
+
+            msgPanel = self.messagesDict.get(id)
+            if msgPanel is None:
+                msgPanel = self.acquire_message_panel()
+                self.messagesDict.update({id: msgPanel})
+                old_i, old_text = None, None
             else:
-                self.message_panel_bg_text.show()
+                old_i, old_text = self.messageState[id]
+
+            if old_i != i:
+                msgPanel.setPos(0, 0, 0.35 - i * 0.21)
+            if old_text != mText:
+                msgPanel['text'] = mText
+            self.messageState[id] = (i, mText)
+
+        if messages:
+            self.message_panel_bg_text.hide()
+        else:
+            self.message_panel_bg_text.show()
+
+    def acquire_message_panel(self):
+        if self.messagePool:
+            msgPanel = self.messagePool.pop()
+            msgPanel.show()
+            return msgPanel
+
+        return DirectFrame(
+            frameColor=(0.2, 0.2, 0.3, 0.2), frameSize=(-0.2, 0.2, -0.1, 0.1),
+            text='', text_pos=(0, 0.05), text_scale=0.05, text_fg=(1, 1, 1, 1), text_wordwrap=8,
+            parent=self.PlanetInfoMessagePanel)
+
+    def release_message_panel(self, id):
+        msgPanel = self.messagesDict.pop(id)
+        self.messageState.pop(id)
+        msgPanel.hide()
+        self.messagePool.append(msgPanel)
 
     def empty_messages(self):
-        for id, panel in self.messagesDict.items():
-            panel.destroy()
-        self.messagesDict = {}
+        for id in list(self.messagesDict):
+            self.release_message_panel(id)
 
     def show_probe_mission(self):
         planet1 = self.world.capitalPlanet
         planet2 = self.obj
         name = self.selectedObjectName
         dist = round(self.world.calc_distance_between_planets(planet1, planet2), 3)
-        time = round(dist * 2)
-        cost = 500 + round(dist * 67)
-        missionText = "Probe misson to {}:\nDistance: {}\nDuration: {}\nCosts: {}".format(name, dist, time, cost)
+        time, cost = self.world.quote_mission('probe', dist)
+        departure, best_dist, best_time, best_cost = self.world.plan_mission(
+            'probe', planet1, planet2, self.launch_window_days)
+        wait = round((departure - self.world.orbit_time()) / self.world.dayscale)
+        missionText = ("Probe misson to {}:\nDistance: {}\nDuration: {}\nCosts: {}\n"
+                       "Cheapest in {} days: {} (in {} days)").format(
+            name, dist, time, cost, self.launch_window_days, best_cost, wait)
         self.world.create_dialog(missionText, 'yesNo', self.start_probe_mission, [planet2, name, dist, time, cost])
 
     def start_probe_mission(self, planet, name, dist, time, cost):
-        if self.world.money >= cost:
-            self.world.money -= cost
-            id = 'probe' + planet.name
-            self.world.add_message(planet, id, 'info', 'Probing Mission', time)
-            taskMgr.doMethodLater(
-                1, self.probe_mission_task,
-                'probeMissionTask',
-                extraArgs=[planet, id],
-                appendTask=True
-            )
-        else:
-            self.world.create_dialog("Not enough Money")
-
-    def probe_mission_task(self, planet, id, task):
-        if planet.messages[id]['value'] > 0:
-            planet.messages[id]['value'] -= 1
-        else:
-            planet.probed = True
-            self.world.remove_message(planet, id)
-            return task.done
-        return task.again
+        problem = self.world.execute('mission', 'probe', planet.name, time, cost)
+        if problem is not None:
+            self.world.create_dialog(problem)
 
     def show_colonise_mission(self):
         planet1 = self.world.capitalPlanet
         planet2 = self.obj
         name = self.selectedObjectName
         dist = round(self.world.calc_distance_between_planets(planet1, planet2), 3)
-        time = round(dist * 4)
-        cost = 3900 + round(dist * 123)
-        missionText = "Colonise misson to {}:\nDistance: {}\nDuration: {}\nCosts: {}".format(name, dist, time, cost)
+        time, cost = self.world.quote_mission('colonise', dist)
+        departure, best_dist, best_time, best_cost = self.world.plan_mission(
+            'colonise', planet1, planet2, self.launch_window_days)
+        wait = round((departure - self.world.orbit_time()) / self.world.dayscale)
+        missionText = ("Colonise misson to {}:\nDistance: {}\nDuration: {}\nCosts: {}\n"
+                       "Cheapest in {} days: {} (in {} days)").format(
+            name, dist, time, cost, self.launch_window_days, best_cost, wait)
         self.world.create_dialog(missionText, 'yesNo', self.start_colonise_mission, [planet2, name, dist, time, cost])
 
     def start_colonise_mission(self, planet, name, dist, time, cost):
-        if self.world.money >= cost:
-            self.world.money -= cost
-            id = 'colonise' + planet.name
-            self.world.add_message(planet, id, 'info', 'Colonise Mission', time)
-            taskMgr.doMethodLater(1, self.colonise_mission_task, 'coloniseMissionTask', extraArgs=[planet, id], appendTask=True)
-        else:
-            self.world.create_dialog("Not enough Money")
-
-    def colonise_mission_task(self, planet, id, task):
-        if planet.messages[id]['value'] > 0:
-            planet.messages[id]['value'] -= 1
-        else:
-            planet.colonised = True
-            planet.messages.pop(id)
-            taskMgr.doMethodLater(self.world.population_time_delta,
-                                  self.world.populate_planet_task,
-                                  'populatePlanetTask',
-                                  extraArgs=[planet],
-                                  appendTask=True)
-            return task.done
-        return task.again
+        problem = self.world.execute('mission', 'colonise', planet.name, time, cost)
+        if problem is not None:
+            self.world.create_dialog(problem)
 
     def toggle_planet_build_mode(self, mode=False):
         obj = self.obj
@@ -220,13 +232,13 @@ class PlanetInfoView():
                 Func(self.NewPlanetBuildView.show)
             )
             zoomInterval.start()
-            taskMgr.remove('updatePlanetInfoTask')
-            taskMgr.add(self.NewPlanetBuildView.refresh_quickinfo_task, 'quickinfoTask', extraArgs=[obj], appendTask=True)
+            self.world.scheduler.remove('updatePlanetInfo')
+            self.NewPlanetBuildView.bind_quickinfo(obj)
 
         else:
             self.NewPlanetBuildView.hide()
             self.NewPlanetBuildView.clear()
-            taskMgr.remove('quickinfoTask')
+            self.NewPlanetBuildView.unbind_quickinfo()
             self.reset(obj)
             zoomInterval = Sequence(
                 Func(self.world.cam_ctrl.info_view_to, obj),
@@ -238,8 +250,10 @@ class PlanetInfoView():
         return None
 
     def create_gui(self):
-        self.infoPanelMap = loader.loadModel('models/gui/panels/planetinfopanel_maps.egg').find('**/planetinfopanel')
-        self.problemPanelMap = loader.loadModel('models/gui/panels/planetproblempanel_maps.egg').find('**/planetproblempanel')
+        self.infoPanelMap = self.world.assets.find(
+            'models/gui/panels/planetinfopanel_maps.egg', '**/planetinfopanel')
+        self.problemPanelMap = self.world.assets.find(
+            'models/gui/panels/planetproblempanel_maps.egg', '**/planetproblempanel')
 
         self.PlanetInfoPanel = DirectFrame(
             pos=(-0.8, 0, 0), frameColor=(0.2, 0.2, 0.22, 0), frameSize=(-0.9, 1.1, -0.65, 0.65),
@@ -0,0 +1,126 @@
+import math
+
+from economy import Economy
+
+
+class ProductionPlan():
+    '''Buildings needed for some output rates, as (blueprint name, count)
+    pairs, with the energy they drain. Plans are shared between callers and
+    must not be changed.'''
+
+    __slots__ = ('buildings', 'energy', 'missing')
+
+    def __init__(self, buildings, energy, missing):
+        self.buildings = buildings
+        self.energy = energy
+        self.missing = missing      # Goods that can't be produced on the planet
+
+    @property
+    def feasible(self):
+        return not self.missing
+
+    def __repr__(self):
+        return 'ProductionPlan({}, energy={}, missing={})'.format(
+            dict(self.buildings), self.energy, sorted(self.missing))
+
+
+class ProductionSolver():
+    '''Producer/consumer graph over all goods of the catalog, and a solver for
+    the buildings a planet needs to reach given output rates per tick. Plans
+    are memoized per catalog version, planet resources and targets.'''
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.cache = {}
+
+        # good -> blueprint IDs producing/consuming it, and blueprint -> input
+        self.producers = {good: ids.tolist() for good, ids in catalog.by_product.items()}
+        self.consumers = {good: ids.tolist() for good, ids in catalog.by_consumed.items()}
+        columns = catalog.columns
+        self.inputs = [columns['req'][id] if columns['dec_val'][id] > 0 else None
+                       for id in range(len(catalog))]
+
+    def solve(self, planet, targets):
+        '''Minimal buildings for targets, a dict of good -> units per tick'''
+
+        resources = (tuple(sorted(planet.rescources.items())), planet.athmosphere)
+        key = (self.catalog.version, resources, tuple(sorted(targets.items())))
+        plan = self.cache.get(key)
+        if plan is None:
+            plan = self._solve(dict(resources[0]), resources[1], targets)
+            self.cache[key] = plan
+        return plan
+
+    def _output(self, id, rescources, athmosphere):
+        # Units per tick of one building on the planet, 0 if it can't be built
+        columns = self.catalog.columns
+        inc = columns['inc_val'][id]
+        if columns['kind'][id] == Economy.EXTRACT:
+            req = columns['req'][id]
+            if req == 'Athmosphere':
+                return inc if athmosphere else 0
+            if req not in rescources:
+                return 0
+            return inc * Economy.PURITY_FACTORS.get(rescources[req], 1)
+        return inc
+
+    def _solve(self, rescources, athmosphere, targets):
+        columns = self.catalog.columns
+        choice = {}     # good -> (buildings per unit, blueprint ID, output)
+
+        # Cheapest producer of every needed good, in buildings per unit of it
+        def choose(good, stack):
+            if good in choice:
+                return choice[good][0]
+            best = (math.inf, None, 0)
+            for id in self.producers.get(good, ()):
+                out = self._output(id, rescources, athmosphere)
+                if out <= 0:
+                    continue
+                cost = 1 / out
+                need = self.inputs[id]
+                if need is not None:
+                    if need in stack:
+                        continue
+                    cost += columns['dec_val'][id] / out * choose(need, stack | {good})
+                if cost < best[0]:
+                    best = (cost, id, out)
+            choice[good] = best
+            return best[0]
+
+        for good in targets:
+            choose(good, frozenset())
+
+        # Consumers before producers, so each good gets its whole demand first
+        order, seen = [], set()
+
+        def visit(good):
+            if good in seen:
+                return
+            seen.add(good)
+            id = choice[good][1]
+            if id is not None and self.inputs[id] is not None:
+                visit(self.inputs[id])
+            order.append(good)
+
+        for good in targets:
+            visit(good)
+
+        demand = dict(targets)
+        counts, missing = {}, set()
+        for good in reversed(order):
+            rate = demand.get(good, 0)
+            cost, id, out = choice[good]
+            if id is None:
+                if rate > 0:
+                    missing.add(good)
+                continue
+            count = math.ceil(rate / out)
+            counts[id] = counts.get(id, 0) + count
+            need = self.inputs[id]
+            if need is not None:
+                demand[need] = demand.get(need, 0) + count * columns['dec_val'][id]
+
+        buildings = tuple((columns['name'][id], count) for id, count in counts.items() if count)
+        energy = sum(int(columns['enr_drain'][id]) * count for id, count in counts.items())
+        return ProductionPlan(buildings, energy, frozenset(missing))
@@ -0,0 +1,201 @@
+from direct.gui.DirectGui import *
+from panda3d.core import *
+
+import csv
+import json
+import time
+
+import numpy as np
+
+# Category of every known task or job, anything else counts as 'other'
+CATEGORIES = {
+    'gameClockTask': 'simulation', 'simulationStep': 'simulation',
+    'orbitTask': 'render', 'cameraTask': 'camera', 'hoverTask': 'input',
+    'assetStreamTask': 'assets', 'startupTask': 'startup',
+    'frameSchedulerTask': 'scheduler', 'scroll_task': 'gui', 'scrollfadetask': 'gui',
+    'hudBindings': 'gui', 'quickinfo': 'gui', 'updatePlanetInfo': 'gui',
+    'profilerOverlay': 'profiler'
+}
+
+
+class TaskStats():
+    '''Call count and run times of one task. The last SAMPLES run times are
+    kept for the percentiles, count, total and max cover every run.'''
+
+    __slots__ = ('name', 'category', 'count', 'total', 'max', 'samples')
+
+    SAMPLES = 512
+
+    def __init__(self, name, category):
+        self.name = name
+        self.category = category
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = [0.0] * self.SAMPLES
+
+    def add(self, seconds):
+        self.samples[self.count % self.SAMPLES] = seconds
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def recent(self):
+        return self.samples[:min(self.count, self.SAMPLES)]
+
+
+class Profiler():
+    '''Times every task added to the task manager after install(), and any
+    other work reported through record(). It only costs two clock reads and
+    a list store per call, so it stays on in normal play.'''
+
+    FIELDS = ('name', 'category', 'count', 'total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms')
+
+    def __init__(self):
+        self.stats = {}
+        self.manager = None
+
+    def stats_of(self, name, category=None):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = TaskStats(name, category or CATEGORIES.get(name, 'other'))
+            self.stats[name] = stats
+        return stats
+
+    def record(self, name, seconds, category=None):
+        self.stats_of(name, category).add(seconds)
+
+    def timed(self, func, name, category=None):
+        # Wraps func so each call gets recorded under name
+        stats = self.stats_of(name, category)
+        clock = time.perf_counter
+
+        def timed_call(*args):
+            start = clock()
+            try:
+                return func(*args)
+            finally:
+                stats.add(clock() - start)
+
+        return timed_call
+
+    # Task manager
+    # ------------
+
+    def install(self, manager=None):
+        # Only one profiler is installed at a time, a new one replaces it
+        manager = manager or taskMgr
+        previous = getattr(manager, 'profiler', None)
+        if previous is not None:
+            previous.uninstall()
+        self.manager = manager
+        self.add, self.do_method_later = manager.add, manager.doMethodLater
+        manager.add = self.add_task
+        manager.doMethodLater = self.do_method_later_task
+        manager.profiler = self
+
+    def uninstall(self):
+        if self.manager is not None:
+            del self.manager.add, self.manager.doMethodLater, self.manager.profiler
+            self.manager = None
+
+    def _wrap(self, funcOrTask, name):
+        if isinstance(funcOrTask, AsyncTask) or not callable(funcOrTask):
+            return funcOrTask, name
+        if name is None:
+            name = getattr(funcOrTask, '__qualname__', None) or funcOrTask.__name__
+        return self.timed(funcOrTask, name), name
+
+    def add_task(self, funcOrTask, name=None, *args, **kwargs):
+        funcOrTask, name = self._wrap(funcOrTask, name)
+        return self.add(funcOrTask, name, *args, **kwargs)
+
+    def do_method_later_task(self, delayTime, funcOrTask, name, *args, **kwargs):
+        funcOrTask, name = self._wrap(funcOrTask, name)
+        return self.do_method_later(delayTime, funcOrTask, name, *args, **kwargs)
+
+    # Reports
+    # -------
+
+    def report(self):
+        '''Rows of FIELDS per task and per category, slowest total first'''
+
+        def row(name, category, count, total, samples, max_time):
+            p50, p95 = np.percentile(samples, (50, 95)) if samples else (0, 0)
+            return {
+                'name': name, 'category': category, 'count': count,
+                'total_ms': total * 1000, 'mean_ms': total * 1000 / count if count else 0,
+                'p50_ms': p50 * 1000, 'p95_ms': p95 * 1000, 'max_ms': max_time * 1000}
+
+        tasks, categories = [], {}
+        for stats in list(self.stats.values()):
+            samples = stats.recent()
+            tasks.append(row(stats.name, stats.category, stats.count, stats.total, samples, stats.max))
+            category = categories.setdefault(stats.category, [0, 0.0, [], 0.0])
+            category[0] += stats.count
+            category[1] += stats.total
+            category[2] += samples
+            category[3] = max(category[3], stats.max)
+
+        tasks.sort(key=lambda task: -task['total_ms'])
+        categories = sorted((row(name, name, *values) for name, values in categories.items()),
+                            key=lambda category: -category['total_ms'])
+        return {'tasks': tasks, 'categories': categories}
+
+    def export_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def export_csv(self, path):
+        # Tasks first, then the categories with 'category' as their name
+        report = self.report()
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, self.FIELDS)
+            writer.writeheader()
+            writer.writerows(report['tasks'])
+            for category in report['categories']:
+                writer.writerow(dict(category, category='category'))
+
+
+class ProfilerOverlay():
+    '''Live list of the tasks that took the most time since the last refresh,
+    toggled on and off. Refreshes as a low priority job of the scheduler.'''
+
+    def __init__(self, profiler, scheduler, rows=8, interval=0.5):
+        self.profiler = profiler
+        self.scheduler = scheduler
+        self.rows = rows
+        self.interval = interval
+        self.last = {}      # Task name -> total seconds at the last refresh
+        self.last_time = 0
+        self.label = DirectLabel(
+            text='', pos=(-0.05, 0, -0.12), frameColor=(0, 0, 0, 0.6), scale=0.04,
+            text_fg=(1, 1, 1, 1), text_align=TextNode.ARight, parent=base.a2dTopRight)
+        self.label.hide()
+
+    def toggle(self):
+        if self.scheduler.has('profilerOverlay'):
+            self.scheduler.remove('profilerOverlay')
+            self.label.hide()
+        else:
+            self.mark()
+            self.scheduler.every(self.interval, self.refresh, 'profilerOverlay', priority=9)
+            self.label.show()
+
+    def mark(self):
+        self.last = {name: stats.total for name, stats in list(self.profiler.stats.items())}
+        self.last_time = time.perf_counter()
+
+    def refresh(self):
+        now = time.perf_counter()
+        elapsed = max(now - self.last_time, 1e-9)
+        recent = sorted(((stats.total - self.last.get(name, 0), stats)
+                         for name, stats in list(self.profiler.stats.items())),
+                        key=lambda entry: -entry[0])[:self.rows]
+        self.mark()
+
+        lines = ['{:<22} {:>6.2f}ms/s {:>6.2f}ms max'.format(
+            stats.name[:22], spent * 1000 / elapsed, stats.max * 1000)
+            for spent, stats in recent if spent > 0]
+        self.label['text'] = '\n'.join(lines) or 'No tasks ran'
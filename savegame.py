@@ -0,0 +1,313 @@
+import json
+import queue
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+from commandlog import CommandLog
+from star import Star
+
+# A save file is the header followed by any number of frames. The first frame
+# holds the full game state, every following one is an incremental snapshot
+# that only holds the planets changed since the frame before, the commands
+# logged since then and the goods and blueprints named since then. Loading
+# applies all frames in order and stops at the first incomplete or damaged one.
+#
+#   header := MAGIC (4s) VERSION (H)
+#   frame  := length (I) crc32 (I) kind (B) zlib(body)
+#   body   := length (I) json(payload) raw array data
+#
+# Arrays in the payload are replaced by {"__array__": n}, the JSON lists the
+# dtype and shape of every array, whose data follows in order. Nothing in a
+# save file can run code when loaded.
+
+MAGIC = b'NoCS'
+VERSION = 1
+HEADER = struct.Struct('<4sH')
+FRAME = struct.Struct('<IIB')
+LENGTH = struct.Struct('<I')
+FULL, SNAPSHOT = 0, 1
+
+# Array types a save file may contain
+DTYPE_KINDS = 'biuf'
+
+_write_lock = threading.Lock()
+_queue = queue.Queue()      # (path, payload) of snapshots for the writer
+_writer = None
+
+
+def save(world, path):
+    '''Writes the full game state to a new save file'''
+
+    kind, payload = _collect(world, path, full=True)
+    flush()
+    _write(path, 'wb', HEADER.pack(MAGIC, VERSION) + _frame(FULL, payload))
+
+
+def snapshot(world, path, background=False):
+    '''Appends the planets that changed since the last save or snapshot of
+    this file to it. The state gets collected right away, compressing and
+    writing can happen in a background thread to keep the frame smooth. One
+    thread writes all of them, in the order they were taken. If the world
+    has nothing in common with the file anymore, e.g. after loading another
+    one, the full state gets appended instead.'''
+
+    global _writer
+    kind, payload = _collect(world, path, full=False)
+    if background:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_queue, name='savegame', daemon=True)
+            _writer.start()
+        _queue.put((path, kind, payload))
+    else:
+        flush()
+        _write_snapshot(path, kind, payload)
+
+
+def flush():
+    '''Waits until all snapshots taken in the background are written'''
+
+    _queue.join()
+
+
+def load(world, path):
+    '''Restores the state of a save file into a freshly created world'''
+
+    flush()
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('{} is not a save file'.format(path))
+    if version != VERSION:
+        raise ValueError('Unsupported save file version {}'.format(version))
+
+    # Names of the goods and blueprints of the file, by their IDs in the file
+    good_map, blueprint_map = [], []
+    pos = HEADER.size
+    while pos + FRAME.size <= len(data):
+        length, crc, kind = FRAME.unpack_from(data, pos)
+        body = data[pos + FRAME.size:pos + FRAME.size + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            break
+        _apply(world, kind, _decode(zlib.decompress(body)), good_map, blueprint_map)
+        pos += FRAME.size + length
+
+    world.ledger.rebuild()
+
+
+def _write_queue():
+    while True:
+        path, kind, payload = _queue.get()
+        try:
+            _write_snapshot(path, kind, payload)
+        finally:
+            _queue.task_done()
+
+
+def _write_snapshot(path, kind, payload):
+    _write(path, 'ab', _frame(kind, payload))
+
+
+def _write(path, mode, data):
+    with _write_lock:
+        with open(path, mode) as f:
+            f.write(data)
+
+
+def _frame(kind, payload):
+    body = zlib.compress(_encode(payload), 1)
+    return FRAME.pack(len(body), zlib.crc32(body), kind) + body
+
+
+# Encoding of the payload
+# -----------------------
+
+def _encode(payload):
+    arrays = []
+
+    def default(value):
+        if isinstance(value, np.ndarray):
+            arrays.append(np.ascontiguousarray(value))
+            return {'__array__': len(arrays) - 1}
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError('Can not save {!r}'.format(value))
+
+    payload = json.dumps(payload, default=default, separators=(',', ':'))
+    shapes = json.dumps([(array.dtype.str, array.shape) for array in arrays])
+    meta = '{{"arrays":{},"payload":{}}}'.format(shapes, payload).encode()
+    return b''.join([LENGTH.pack(len(meta)), meta] + [array.tobytes() for array in arrays])
+
+
+def _decode(data):
+    (length,) = LENGTH.unpack_from(data)
+    meta = json.loads(data[LENGTH.size:LENGTH.size + length])
+
+    arrays, pos = [], LENGTH.size + length
+    for dtype, shape in meta['arrays']:
+        dtype = np.dtype(dtype)
+        if dtype.kind not in DTYPE_KINDS:
+            raise ValueError('Unsupported array type {} in save file'.format(dtype))
+        size = dtype.itemsize * int(np.prod(shape))
+        arrays.append(np.frombuffer(data[pos:pos + size], dtype).reshape(shape).copy())
+        pos += size
+
+    def arrays_in(value):
+        if isinstance(value, dict):
+            if value.keys() == {'__array__'}:
+                return arrays[value['__array__']]
+            return {key: arrays_in(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [arrays_in(item) for item in value]
+        return value
+
+    return arrays_in(meta['payload'])
+
+
+# Collecting and applying the game state
+# --------------------------------------
+
+class _Mark():
+    '''How much of the state of a world a save file holds. Every save file
+    has its own, so saving to one file does not make the snapshots of another
+    one miss changes.'''
+
+    __slots__ = ('generation', 'log', 'commands', 'goods', 'blueprints')
+
+    def __init__(self, generation, log, commands, goods, blueprints):
+        self.generation = generation    # Of the economy, see Economy.stamp()
+        self.log = log
+        self.commands = commands
+        self.goods = goods
+        self.blueprints = blueprints
+
+
+def _collect(world, path, full):
+    # Returns the frame kind and payload of the state the file is missing
+    economy = world.economy
+    log = world.command_log
+    mark = world.save_marks.get(path)
+    if full or mark is None or mark.log is not log:
+        kind, mark = FULL, _Mark(-1, log, 0, 0, 0)
+    else:
+        kind = SNAPSHOT
+    world.save_marks[path] = _Mark(economy.stamp(), log, len(log),
+                                   len(economy.good_names), len(economy.blueprint_names))
+
+    payload = {
+        'world': {
+            'seed': world.seed,
+            'rng': world.rng.getstate(),
+            'commands': log.since(mark.commands),
+            'sim_time': world.sim_time,
+            'money': world.money,
+            'yearCounter': world.yearCounter,
+            'dayCounter': world.dayCounter,
+            'system_population': world.system_population,
+            'missions': [(m.id, m.kind, m.planet.name, m.launched, m.due) for m in world.missions],
+            'next_mission_id': world.missions.next_id,
+            'economy_tick': economy.tick_count,
+            'good_names': economy.good_names[mark.goods:],
+            'blueprint_names': economy.blueprint_names[mark.blueprints:],
+        },
+        'planets': {}
+    }
+
+    for row in economy.changed_since(mark.generation):
+        planet = economy.planets[row]
+        payload['planets'][planet.name] = _collect_planet(economy, planet)
+    return kind, payload
+
+
+def _collect_planet(economy, planet):
+    row = planet.eco_id
+    ids = np.flatnonzero(economy.b_alive & (economy.b_planet == row))
+    return {
+        'population': planet.population,
+        'habitation_cap': planet.habitation_cap,
+        'probed': planet.probed,
+        'colonised': planet.colonised,
+        'messages': {id: dict(message) for id, message in planet.messages.items()},
+        'goods': economy.goods[row].copy(),
+        'present': economy.present[row].copy(),
+        'energy_cap': int(economy.energy_cap[row]),
+        'energy_usg': int(economy.energy_usg[row]),
+        'buildings': {field: getattr(economy, 'b_' + field)[ids].copy()
+                      for field, dtype in economy.BUILDING_FIELDS},
+    }
+
+
+def _apply(world, kind, payload, good_map, blueprint_map):
+    economy = world.economy
+    state = payload['world']
+
+    world.seed = state['seed']
+    version, internal, gauss = state['rng']
+    world.rng.setstate((version, tuple(internal), gauss))
+    if kind == FULL:
+        world.command_log = CommandLog(state['seed'])
+        good_map.clear()
+        blueprint_map.clear()
+    world.command_log.extend(state['commands'])
+    world.sim_time = state['sim_time']
+    world.money = state['money']
+    world.yearCounter = state['yearCounter']
+    world.dayCounter = state['dayCounter']
+    economy.tick_count = state['economy_tick']
+
+    # IDs might differ between game versions, so they get mapped by name
+    good_map += [economy.intern_good(name) for name in state['good_names']]
+    blueprint_map += [economy.intern_blueprint(name) for name in state['blueprint_names']]
+    goods = np.array(good_map, np.int32)
+    blueprints = np.array(blueprint_map, np.int32)
+
+    for name, data in payload['planets'].items():
+        planet = world.get_object(name)
+        if type(planet) != Star:
+            _apply_planet(economy, planet, data, goods, blueprints)
+
+    # Mission messages are saved with their countdown at that time, they get
+    # replaced by live ones again
+    world.missions.clear()
+    for id, kind, name, launched, due in state['missions']:
+        world.missions.restore(id, kind, world.get_object(name), launched, due)
+    world.missions.next_id = max(world.missions.next_id, state['next_mission_id'])
+
+
+def _apply_planet(economy, planet, data, good_map, blueprint_map):
+    row = planet.eco_id
+
+    planet.population = data['population']
+    planet.habitation_cap = data['habitation_cap']
+    planet.probed = data['probed']
+    planet.colonised = data['colonised']
+    planet.messages = data['messages']
+    economy.goods[row] = 0
+    economy.present[row] = False
+    economy.goods[row, good_map] = data['goods']
+    economy.present[row, good_map] = data['present']
+    economy.energy_cap[row] = data['energy_cap']
+    economy.energy_usg[row] = data['energy_usg']
+
+    for section, slots in planet.slots.items():
+        for slot in slots:
+            economy.remove_building(planet, section, slot)
+            slots[slot] = None
+
+    buildings = data['buildings']
+    for n in range(len(buildings['alive'])):
+        section = economy.SECTION_ORDER[buildings['section'][n]]
+        slot = str(buildings['slot'][n])
+        b_name = economy.blueprint_names[blueprint_map[buildings['blueprint'][n]]]
+        building = economy.add_building(planet, section, slot, b_name)
+        for field, dtype in economy.BUILDING_FIELDS:
+            if field not in ('alive', 'planet', 'blueprint'):
+                getattr(economy, 'b_' + field)[building.id] = buildings[field][n]
+        for field in ('in', 'out'):
+            value = buildings[field][n]
+            getattr(economy, 'b_' + field)[building.id] = good_map[value] if value >= 0 else -1
+        planet.slots[section][slot] = building
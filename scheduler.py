@@ -0,0 +1,81 @@
+import time
+
+
+class Job():
+    '''Periodic callback of the frame scheduler'''
+
+    __slots__ = ('name', 'callback', 'interval', 'priority', 'due', 'cost')
+
+    def __init__(self, name, callback, interval, priority, due):
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.priority = priority    # Lower runs first, like the sort of tasks
+        self.due = due
+        self.cost = 0.0             # Smoothed seconds per run
+
+
+class FrameScheduler():
+    '''Runs the periodic work of the GUI from one task. Jobs with the same
+    interval get spread over it instead of coming due in the same frame. A
+    frame runs due jobs by priority only as long as they fit into budget
+    seconds, the rest is deferred to the next frames. The first due job of a
+    frame always runs, so nothing starves.'''
+
+    def __init__(self, budget=0.004, profiler=None):
+        self.budget = budget
+        self.profiler = profiler    # Gets the run time of every job
+        self.jobs = {}
+        self.deferred = 0           # Job runs pushed to a later frame so far
+
+    def start(self):
+        taskMgr.add(self.schedule_task, 'frameSchedulerTask', sort=40)
+
+    def every(self, interval, callback, name, priority=1):
+        # Replaces any job of the same name
+        self.remove(name)
+        now = globalClock.getFrameTime()
+        self.jobs[name] = Job(name, callback, interval, priority,
+                              now + interval * self.phase(interval))
+        return self.jobs[name]
+
+    def phase(self, interval):
+        # Van der Corput sequence over the jobs of the interval, so every new
+        # job fills one of the biggest gaps between the earlier ones
+        n = sum(1 for job in self.jobs.values() if job.interval == interval) + 1
+        phase, base = 0.0, 0.5
+        while n:
+            n, bit = divmod(n, 2)
+            phase += bit * base
+            base /= 2
+        return phase
+
+    def remove(self, name):
+        self.jobs.pop(name, None)
+
+    def has(self, name):
+        return name in self.jobs
+
+    def schedule_task(self, task):
+        now = globalClock.getFrameTime()
+        due = [job for job in self.jobs.values() if job.due <= now]
+        if not due:
+            return task.cont
+        due.sort(key=lambda job: (job.priority, job.due))
+
+        start = time.perf_counter()
+        for i, job in enumerate(due):
+            used = time.perf_counter() - start
+            if i and used + job.cost > self.budget:
+                self.deferred += len(due) - i
+                break
+            if self.jobs.get(job.name) is not job:
+                continue    # Removed by a job before it
+            # Keep the phase, but skip runs that were missed completely
+            job.due += job.interval * ((now - job.due) // job.interval + 1)
+            job.callback()
+            spent = time.perf_counter() - start - used
+            job.cost += (spent - job.cost) * 0.2
+            if self.profiler is not None:
+                self.profiler.record(job.name, spent)
+        return task.cont
@@ -7,7 +7,11 @@ from direct.gui.DirectGui import DirectFrame, DirectScrolledFrame, DirectLabel,
 class ScrolledItemSelector(DirectObject):
     '''Touch optimised list that holds a set of items. By clicking on one you select it and return
     its Value with get_selected(). To add an item simply use add_item(). You can also pass a
-    function with the 'command' field that gets called on a selection switch'''
+    function with the 'command' field that gets called on a selection switch.
+
+    With 'virtual' set, items are only stored as data. Just enough rows to cover the visible
+    part of the canvas (plus 'row_margin' on each side) exist as widgets, and they get rebound
+    to other items while scrolling. That way long lists cost the same as short ones.'''
 
     def __init__(self,
                  frame_size=(1, 1.5),
@@ -19,7 +23,10 @@ class ScrolledItemSelector(DirectObject):
                  item_side_ratio=0.2,
                  item_background=(0.3, 0.3, 0.3, 1),
                  item_background_active=(0.6, 0.6, 0.6, 1),
-                 command=lambda: None
+                 command=lambda: None,
+                 virtual=False,
+                 row_margin=1,
+                 assets=None
                  ):
 
         self.f_x, self.f_y = frame_size
@@ -55,9 +62,18 @@ class ScrolledItemSelector(DirectObject):
         self.i_start = self.c_y / 2 + self.i_y / 2
 
         self.active_item = None
+        self.active_index = None
         self.item_list = []
         self.value_list = []
 
+        self.virtual = virtual
+        self.row_margin = row_margin
+        self.data_list = []     # add_item() arguments of every item in virtual mode
+        self.row_pool = []      # Unbound row widgets in virtual mode
+        self.bound_rows = {}    # Item index -> row widget bound to it
+        self.assets = assets    # Optional AssetRegistry to share item images
+        self.image_paths = []   # Images claimed from the registry by non-virtual items
+
         self.start_mY = None
         self.old_mY = None
         self.m_diff = 0
@@ -84,10 +100,14 @@ class ScrolledItemSelector(DirectObject):
                 self.active_item['frameColor'] = self.item_background
             item['frameColor'] = self.item_background_active
             self.active_item = item
+            if self.virtual:
+                self.active_index = item.getPythonTag('index')
+            else:
+                self.active_index = int(item['text']) - 1
             self.command()
 
     def _start_scroll(self):
-        n = len(self.item_list)
+        n = len(self.value_list)
         content_length = (
             (n * (self.i_y + self.item_v_padding)) +  # Size of all elements with padding
             self.item_v_padding)                   # Add one padding for the bottom
@@ -106,7 +126,7 @@ class ScrolledItemSelector(DirectObject):
         mY = base.mouseWatcherNode.getMouse().getY()
         old_c = self.canvas.getZ()
         self.m_diff = self.old_mY - mY
-        n = len(self.item_list)
+        n = len(self.value_list)
 
         if self.m_diff != 0:
             self.is_scrolling = True
@@ -130,6 +150,7 @@ class ScrolledItemSelector(DirectObject):
         elif not hits_not_lower_bound:
             self.canvas.setZ(self.c_scroll_stop)
 
+        self._bind_rows()
         self.old_mY = mY
         return task.again
 
@@ -139,7 +160,7 @@ class ScrolledItemSelector(DirectObject):
             return task.done
 
         old_c = self.canvas.getZ()
-        n = len(self.item_list)
+        n = len(self.value_list)
         self.c_scroll_start = 0
         self.c_scroll_stop = (
             (n * (self.i_y + self.item_v_padding)) +  # Size of all elements with padding
@@ -152,14 +173,17 @@ class ScrolledItemSelector(DirectObject):
         if hits_not_upper_bound and hits_not_lower_bound:
             self.canvas.setZ(old_c - self.m_diff)
             self.m_diff *= 0.85
+            self._bind_rows()
             return task.again
         elif not hits_not_upper_bound:
             self.canvas.setZ(self.c_scroll_start)
             self.m_diff = 0
+            self._bind_rows()
             return task.done
         elif not hits_not_lower_bound:
             self.canvas.setZ(self.c_scroll_stop)
             self.m_diff = 0
+            self._bind_rows()
             return task.done
 
     def add_item(self,
@@ -176,6 +200,14 @@ class ScrolledItemSelector(DirectObject):
         Value: The item has function 'get/set_value()' to work with individual
         values of an activated element. Value gets set to the item on adding it.'''
 
+        if self.virtual:
+            self.data_list.append({
+                'image': image, 'image_scale': image_scale, 'image_pos': image_pos,
+                'title': title, 'title_pos': title_pos, 'text': text, 'text_pos': text_pos})
+            self.value_list.append(value)
+            self._bind_rows()
+            return
+
         item_nr = len(self.item_list) + 1
         item_pos = self.i_start - (self.i_y + self.item_v_padding) * item_nr
 
@@ -195,7 +227,7 @@ class ScrolledItemSelector(DirectObject):
 
         if image is not None:
             OnscreenImage(  # Add an Image
-                image=image,
+                image=self._acquire_image(image),
                 pos=image_pos,
                 scale=(1 * image_scale, 1, 1 * image_scale),
                 parent=(item))
@@ -219,17 +251,126 @@ class ScrolledItemSelector(DirectObject):
         self.item_list.append(item)
         self.value_list.append(value)
 
+    def _bind_rows(self):
+        '''Makes sure exactly the items around the visible part of the canvas are bound
+        to a row widget. Rows of items that scrolled out get recycled for the new ones.'''
+
+        if not self.virtual:
+            return
+
+        row_height = self.i_y + self.item_v_padding
+        first = max(0, int(self.canvas.getZ() // row_height) - self.row_margin)
+        count = int(self.f_y // row_height) + 1 + 2 * self.row_margin
+        visible = range(first, min(first + count, len(self.data_list)))
+
+        for index in list(self.bound_rows):
+            if index not in visible:
+                self._unbind_row(self.bound_rows.pop(index))
+
+        for index in visible:
+            if index not in self.bound_rows:
+                row = self.row_pool.pop() if self.row_pool else self._create_row()
+                self._bind_row(row, index)
+                self.bound_rows[index] = row
+
+        self.active_item = self.bound_rows.get(self.active_index)
+
+    def _create_row(self):
+        row = DirectFrame(
+            parent=self.canvas,
+            frameSize=self.i_size,
+            frameColor=self.item_background,
+            borderWidth=(0.01, 0.01),
+            relief=DGG.FLAT,
+            state=DGG.NORMAL,
+            enableEdit=0,
+            suppressMouse=0)
+        row.bind(DGG.B1RELEASE, self._switch_active_item, [row])
+
+        row.image = None
+        row.image_path = None
+        row.title = DirectLabel(parent=row,
+                                text='',
+                                text_scale=self.i_y / 4,
+                                text_fg=(1, 1, 1, 1),
+                                text_align=TextNode.ALeft,
+                                frameColor=(0, 0, 0, 0))
+        row.text = DirectLabel(parent=row,
+                               text='',
+                               text_scale=self.i_y / 5,
+                               text_fg=(1, 1, 1, 1),
+                               text_align=TextNode.ALeft,
+                               frameColor=(0, 0, 0, 0))
+        return row
+
+    def _bind_row(self, row, index):
+        data = self.data_list[index]
+        row.setPythonTag('index', index)
+        row.setPos(0, 0, self.i_start - (self.i_y + self.item_v_padding) * (index + 1))
+        if index == self.active_index:
+            row['frameColor'] = self.item_background_active
+        else:
+            row['frameColor'] = self.item_background
+
+        row.image_path = data['image']
+
+        if data['image'] is not None:
+            texture = self._acquire_image(data['image'])
+            if isinstance(texture, str):
+                texture = loader.loadTexture(texture)
+            if row.image is None:
+                row.image = OnscreenImage(image=texture, parent=row)
+            else:
+                row.image.setTexture(texture, 1)
+                row.image.show()
+            row.image.setPos(data['image_pos'])
+            row.image.setScale(data['image_scale'], 1, data['image_scale'])
+        elif row.image is not None:
+            row.image.hide()
+
+        row.title['text'] = data['title'] or ''
+        row.title.setPos(data['title_pos'])
+        row.text['text'] = data['text'] or ''
+        row.text.setPos(data['text_pos'])
+        row.show()
+
+    def _unbind_row(self, row):
+        self._release_image(row.image_path)
+        row.image_path = None
+        row.hide()
+        self.row_pool.append(row)
+
+    def _acquire_image(self, path):
+        if self.assets is None:
+            return path
+        if not self.virtual:
+            self.image_paths.append(path)
+        return self.assets.acquire_texture(path)
+
+    def _release_image(self, path):
+        if self.assets is not None and path is not None:
+            self.assets.release_texture(path)
+
     def get_active_item(self):
         return self.active_item
 
     def set_active_item(self, pos):
-        self._switch_active_item(self.item_list[pos], None)
+        if self.virtual:
+            if self.active_item is not None:
+                self.active_item['frameColor'] = self.item_background
+            self.active_index = pos
+            self.active_item = self.bound_rows.get(pos)
+            if self.active_item is not None:
+                self.active_item['frameColor'] = self.item_background_active
+            self.command()
+        else:
+            self._switch_active_item(self.item_list[pos], None)
 
     def get_active_id(self):
-        return int(self.active_item['text'])
+        return self.active_index + 1
 
     def get_active_value(self):
-        return self.value_list[int(self.active_item['text']) - 1]
+        return self.value_list[self.active_index]
 
     def hide(self):
         '''Triggers the DirectFrame.hide() of the main frame'''
@@ -242,12 +383,21 @@ class ScrolledItemSelector(DirectObject):
         self.frame.show()
 
     def clear(self):
-        '''Destroys every item that was added to the list'''
+        '''Destroys every item that was added to the list. Rows of a virtual list are kept
+        for the next items.'''
 
         for item in self.item_list:
             item.destroy()
+        for path in self.image_paths:
+            self._release_image(path)
+        for row in self.bound_rows.values():
+            self._unbind_row(row)
         self.item_list = []
+        self.image_paths = []
+        self.data_list = []
+        self.bound_rows = {}
         self.active_item = None
+        self.active_index = None
         self.value_list = []
         self.canvas.setZ(0)
 
@@ -0,0 +1,53 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+from star import Star
+
+# State of one planet or moon as the GUI shows it. Goods are (good, amount)
+# pairs, messages (id, text, value) triples in message order. Slots maps every
+# section to a mapping of its slots to a SlotState, or None if empty.
+BodyState = namedtuple('BodyState', (
+    'population', 'habitation_cap', 'energy_cap', 'energy_usg',
+    'probed', 'colonised', 'goods', 'messages', 'slots'))
+
+# Building in one slot, problem_text is empty while it runs as intended
+SlotState = namedtuple('SlotState', ('name', 'problem_text'))
+
+# State of the whole game as the GUI shows it, bodies maps names to BodyState
+WorldState = namedtuple('WorldState', (
+    'sim_time', 'year', 'day', 'money', 'population', 'bodies'))
+
+
+def capture(world):
+    '''Copies everything the GUI reads from the simulation into an immutable
+    WorldState. It holds only numbers, strings and tuples, so it can be read
+    from another thread while the simulation goes on.'''
+
+    bodies = {}
+    for obj in world.galaxy_objects:
+        if type(obj) == Star:
+            continue
+        bodies[obj.name] = BodyState(
+            obj.population, obj.habitation_cap, obj.energy_cap, obj.energy_usg,
+            obj.probed, obj.colonised, tuple(obj.goods.items()),
+            tuple((id, m['text'], m['value']) for id, m in obj.messages.items()),
+            MappingProxyType({section: MappingProxyType({
+                slot: None if building is None else SlotState(building['name'], building['problemText'])
+                for slot, building in slots.items()}) for section, slots in obj.slots.items()}))
+
+    return WorldState(world.sim_time, world.yearCounter, world.dayCounter, world.money,
+                      world.system_population, MappingProxyType(bodies))
+
+
+class SnapshotBuffer():
+    '''Double buffer of world states. The simulation publishes into the back
+    slot and swaps, readers only ever see the complete front state. The back
+    slot keeps the state before it.'''
+
+    def __init__(self):
+        self.front = None
+        self.back = None
+
+    def publish(self, state):
+        self.back = state
+        self.front, self.back = self.back, self.front
@@ -0,0 +1,102 @@
+import math
+
+import numpy as np
+
+
+class SpatialIndex():
+    '''Positions of all bodies in the orbital plane at one point in time, in a
+    uniform grid. It gets rebuilt in linear time at most once per time asked
+    for. Distances are computed on demand from the positions, radius and
+    nearest neighbour queries only look at the grid cells around the body.'''
+
+    def __init__(self, orbits, cell_size=5):
+        self.orbits = orbits
+        self.cell_size = cell_size
+        self.time = None
+        self.positions = None
+        self.keys = None        # Grid cell of every body
+        self.cells = {}         # Grid cell -> IDs of the bodies in it
+        self.bounds = None      # Lowest and highest occupied cell
+
+    def update(self, t):
+        if t == self.time:
+            return
+        self.time = t
+        self.positions = self.orbits.positions(t)[:, :2]
+        self.keys = np.floor(self.positions / self.cell_size).astype(int)
+        self.bounds = (self.keys.min(axis=0).tolist(), self.keys.max(axis=0).tolist())
+
+        self.cells = {}
+        for id, key in enumerate(self.keys.tolist()):
+            self.cells.setdefault(tuple(key), []).append(id)
+
+    def _distances(self, id, others):
+        diff = self.positions[others] - self.positions[id]
+        return np.hypot(diff[:, 0], diff[:, 1])
+
+    def distance(self, body1, body2):
+        x, y = self.positions[self.orbits.index[body1]] - self.positions[self.orbits.index[body2]]
+        return math.hypot(x, y)
+
+    def distance_matrix(self, bodies1, bodies2):
+        '''Distances between every body of the first and the second list'''
+
+        points1 = self.positions[[self.orbits.index[body] for body in bodies1]]
+        points2 = self.positions[[self.orbits.index[body] for body in bodies2]]
+        diff = points1[:, None, :] - points2[None, :, :]
+        return np.hypot(diff[..., 0], diff[..., 1])
+
+    def _ring(self, key, r):
+        # IDs in the cells exactly r cells away from key, in both directions
+        cx, cy = key
+        if r == 0:
+            return list(self.cells.get((cx, cy), ()))
+        found = []
+        for x in range(cx - r, cx + r + 1):
+            found += self.cells.get((x, cy - r), ())
+            found += self.cells.get((x, cy + r), ())
+        for y in range(cy - r + 1, cy + r):
+            found += self.cells.get((cx - r, y), ())
+            found += self.cells.get((cx + r, y), ())
+        return found
+
+    def nearest(self, body, k=1):
+        '''The k closest other bodies, closest first'''
+
+        id = self.orbits.index[body]
+        key = self.keys[id].tolist()
+        k = min(k, len(self.positions) - 1)
+        if k <= 0:
+            return []
+        (lx, ly), (hx, hy) = self.bounds
+        last_ring = max(key[0] - lx, hx - key[0], key[1] - ly, hy - key[1])
+
+        candidates, distances = [], np.empty(0)
+        for r in range(last_ring + 1):
+            ring = [other for other in self._ring(key, r) if other != id]
+            if ring:
+                candidates += ring
+                distances = np.append(distances, self._distances(id, ring))
+            # Bodies beyond this ring are at least r cells away
+            if k <= len(candidates) and np.sort(distances)[k - 1] <= r * self.cell_size:
+                break
+
+        order = np.argsort(distances, kind='stable')[:k]
+        return [self.orbits.bodies[candidates[i]] for i in order]
+
+    def within(self, body, radius):
+        '''All other bodies closer than radius, closest first'''
+
+        id = self.orbits.index[body]
+        x, y = self.positions[id]
+        candidates = []
+        for cx in range(math.floor((x - radius) / self.cell_size),
+                        math.floor((x + radius) / self.cell_size) + 1):
+            for cy in range(math.floor((y - radius) / self.cell_size),
+                            math.floor((y + radius) / self.cell_size) + 1):
+                candidates += [other for other in self.cells.get((cx, cy), ()) if other != id]
+        if not candidates:
+            return []
+        distances = self._distances(id, candidates)
+        order = np.argsort(distances, kind='stable')
+        return [self.orbits.bodies[candidates[i]] for i in order if distances[i] <= radius]
@@ -9,9 +9,10 @@ class Star():
         self.name = name
         self.scale = scale
 
-        self.model = loader.loadModel(model_path)
-        self.model.setTexture(loader.loadTexture(texture), 1)
-        self.model.reparentTo(render)
+        self.model = render.attachNewNode(name)
+        if not world.headless:
+            world.assets.request_model(model_path, self.model)
+            world.assets.request_texture(texture, self.model)
         self.model.setScale(scale * world.sizescale)
         self.model.setTag('clickable', 'yes')
         self.model.setPythonTag('instance', self)
@@ -25,5 +26,8 @@ class Star():
 
         world.galaxy_objects.append(self)
 
-    def getPos(self):
-        return self.model.getPos(base.render)
+    def getPos(self, t=None):
+        # Position at game time t, by default right now
+        if t is None:
+            t = self.world.orbit_time()
+        return Point3(*self.world.orbits.position(self, t))
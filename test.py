@@ -1,6 +1,21 @@
+import json
+import math
+import os
+import pickle
+import time
 import unittest
 from panda3d.core import *
+from direct.gui.DirectGui import DirectLabel
+from direct.task.Task import TaskManager
 from NoC import World
+from assets import AssetRegistry
+from bindings import Bindings
+from catalog import load_catalog
+import buildingsDB
+import savegame
+from profiler import Profiler
+from scheduler import FrameScheduler
+from scrolleditemselector import ScrolledItemSelector
 
 
 class TestNoC(unittest.TestCase):
@@ -20,6 +35,89 @@ class TestNoC(unittest.TestCase):
         self.w.toggle_planet_info_mode(True, self.w.Earth)
         self.assertEqual(self.w.NewPlanetInfoView.PlanetInfoTitle['text'], 'Earth')
 
+    def test_pick_body(self):
+        """ Pick Earth through its projected center and nothing in empty space"""
+        w = self.w
+        mat = base.camera.getMat()
+        center = Point3(*w.orbits.position(w.Earth, w.orbit_time()))
+        base.camera.setPos(center + Vec3(5, 5, 200))
+        base.camera.lookAt(center)
+        try:
+            point = Point2()
+            base.camLens.project(base.cam.getRelativePoint(render, center), point)
+            self.assertIs(w.picker.pick(point), w.Earth)
+            base.camera.lookAt(center + Vec3(0, 0, 400))
+            self.assertIsNone(w.picker.pick(Point2(0, 0)))
+        finally:
+            base.camera.setMat(mat)
+
+    def test_message_panel_pool(self):
+        """ Reuse message panels and only set the text of changed messages"""
+        w = self.w
+        view = w.NewPlanetInfoView
+        messages = w.Mercury.messages
+        w.Mercury.messages = {}
+        for n in range(3):
+            w.add_message(w.Mercury, 'test{}'.format(n), 'problem', 'Message {}'.format(n), n)
+        w.clock.publish()
+        w.toggle_planet_info_mode(True, w.Mercury)
+        try:
+            panels = {id(panel) for panel in view.messagesDict.values()}
+            panels |= {id(panel) for panel in view.messagePool}
+            texts = []
+            for panel in view.messagesDict.values():
+                text = panel.component('text0')
+                text.setText = lambda value, set_text=text.setText: (texts.append(value), set_text(value))
+
+            w.add_message(w.Mercury, 'test1', 'problem', 'Message 1', 10)
+            w.clock.publish()
+            view.load_messages()
+            self.assertEqual(texts, ['Message 1\n10'])
+
+            w.remove_message(w.Mercury, 'test2')
+            w.add_message(w.Mercury, 'test3', 'problem', 'Message 3', 3)
+            w.clock.publish()
+            view.load_messages()
+            view.reset(w.Mercury)
+            self.assertEqual(len(view.messagesDict), 3)
+            self.assertEqual({id(panel) for panel in view.messagesDict.values()} |
+                             {id(panel) for panel in view.messagePool}, panels)
+        finally:
+            w.Mercury.messages = messages
+            w.clock.publish()
+            w.toggle_planet_info_mode(False)
+
+    def test_camera_states(self):
+        """ Follow a body through a transition and stop the camera task when idle"""
+        ctrl = self.w.cam_ctrl
+
+        def settle():
+            for _ in range(100):
+                if ctrl.state != 'transition':
+                    break
+                time.sleep(0.01)
+                taskMgr.step()
+
+        ctrl.info_view_to(self.w.Earth)
+        self.assertEqual(ctrl.state, 'transition')
+        self.assertTrue(taskMgr.hasTaskNamed('cameraTask'))
+        settle()
+        self.assertEqual(ctrl.state, 'follow')
+        taskMgr.step()
+        self.assertTrue(taskMgr.hasTaskNamed('cameraTask'))
+        self.assertLess((ctrl.camAnchor.getPos() - self.w.Earth.getPos()).length(), 0.1)
+
+        ctrl.reset()
+        settle()
+        self.assertEqual(ctrl.state, 'free')
+        self.assertFalse(taskMgr.hasTaskNamed('cameraTask'))
+
+        ctrl.setMove(True, 'left')
+        self.assertTrue(taskMgr.hasTaskNamed('cameraTask'))
+        ctrl.setMove(False, 'left')
+        taskMgr.step()
+        self.assertFalse(taskMgr.hasTaskNamed('cameraTask'))
+
     def test_build_windturbine(self):
         """ Simulate build process of a wind turbine on earth"""
         self.w.toggle_planet_info_mode(True, self.w.Earth)
@@ -51,6 +149,455 @@ class TestNoC(unittest.TestCase):
         self.w.NewPlanetInfoView.start_colonise_mission(self.w.Mars, 'Mars', dist, 5, 3000)
         self.assertNotEqual(self.w.Mars.messages, {})
 
+    def test_replay_command_log(self):
+        """ Replay a headless session from its command log"""
+        w = World(headless=True, seed=42)
+        w.execute('construct', 'Earth', 'ENR', '1', 'Wind Turbine')
+        w.simulate(days=1)
+        w.execute('construct', 'Earth', 'RES', '1', 'Coal Drill')
+        w.execute('mission', 'probe', 'Venus', 30, 500)
+        w.simulate(days=3)
+
+        replayed = World.replay(w.command_log, until=w.sim_time)
+        self.assertEqual(replayed.money, w.money)
+        self.assertEqual(replayed.Earth.population, w.Earth.population)
+        self.assertEqual(dict(replayed.Earth.goods), dict(w.Earth.goods))
+        self.assertTrue(replayed.Venus.probed)
+
+    def test_save_and_load_snapshots(self):
+        """ Save a headless game, append a snapshot and load both into a new world"""
+        path = 'test_savegame.noc'
+        w = World(headless=True, seed=3)
+        w.execute('construct', 'Earth', 'ENR', '1', 'Wind Turbine')
+        w.execute('construct', 'Earth', 'RES', '1', 'Coal Drill')
+        w.simulate(days=1)
+        w.save_game(path)
+        w.execute('construct', 'Earth', 'ENR', '2', 'Wind Turbine')
+        w.execute('construct', 'Earth', 'RES', '2', 'Iron Mine')
+        w.simulate(days=1)
+        savegame.snapshot(w, path, background=True)
+        w.execute('construct', 'Earth', 'RES', '3', 'Coal Drill')
+        savegame.snapshot(w, path, background=True)
+
+        loaded = World(headless=True)
+        loaded.load_game(path)
+        os.remove(path)
+        self.assertEqual(loaded.command_log.dumps(), w.command_log.dumps())
+        self.assertEqual(loaded.money, w.money)
+        self.assertEqual(loaded.sim_time, w.sim_time)
+        self.assertEqual(dict(loaded.Earth.goods), dict(w.Earth.goods))
+        self.assertEqual(loaded.Earth.slots['RES']['2']['name'], 'Iron Mine')
+
+        w.simulate(days=1)
+        loaded.simulate(days=1)
+        self.assertEqual(loaded.Earth.population, w.Earth.population)
+        self.assertEqual(dict(loaded.Earth.goods), dict(w.Earth.goods))
+
+    def test_snapshot_after_save_to_other_file(self):
+        """ A full save to another file leaves the changes for the snapshot"""
+        w = World(headless=True)
+        w.save_game('test_auto.noc')
+        w.execute('construct', 'Earth', 'ENR', '1', 'Wind Turbine')
+        w.save_game('test_manual.noc')
+        w.step()
+        savegame.snapshot(w, 'test_auto.noc')
+
+        loaded = World(headless=True)
+        loaded.load_game('test_auto.noc')
+        os.remove('test_auto.noc')
+        os.remove('test_manual.noc')
+        self.assertEqual(loaded.Earth.slots['ENR']['1']['name'], 'Wind Turbine')
+        self.assertEqual(loaded.Earth.energy_cap, w.Earth.energy_cap)
+
+    def test_snapshot_holds_only_new_commands(self):
+        """ Snapshots only carry the commands and names added since the last frame"""
+        path = 'test_delta.noc'
+        w = World(headless=True)
+        w.execute('construct', 'Earth', 'ENR', '1', 'Wind Turbine')
+        w.save_game(path)
+        w.execute('construct', 'Earth', 'ENR', '2', 'Wind Turbine')
+        kind, payload = savegame._collect(w, path, full=False)
+        self.assertEqual(kind, savegame.SNAPSHOT)
+        self.assertEqual(len(payload['world']['commands']), 1)
+        self.assertEqual(payload['world']['good_names'], [])
+        self.assertEqual(list(payload['planets']), ['Earth'])
+
+        # A world that loaded the file shares nothing with it yet
+        loaded = World(headless=True)
+        loaded.load_game(path)
+        os.remove(path)
+        self.assertEqual(savegame._collect(loaded, path, full=False)[0], savegame.FULL)
+
+    def test_autosave_keeps_last_session(self):
+        """ Starting the autosave keeps the one of the session before"""
+        path = 'test_autosave.noc'
+        w = World(headless=True)
+        w.enable_autosave(path)
+        w.autosave()
+        w.clock.cancel(w.autosave)
+
+        w.enable_autosave(path)
+        w.clock.cancel(w.autosave)
+        self.assertFalse(os.path.exists(path))
+        loaded = World(headless=True)
+        loaded.load_game(path + '.1')
+        os.remove(path + '.1')
+        self.assertEqual(loaded.money, w.money)
+
+    def test_orbit_positions(self):
+        """ Query positions of planets headless and in the future"""
+        w = World(headless=True)
+        year = w.yearscale
+        self.assertAlmostEqual(w.Earth.getPos(year / 4)[1], w.orbitscale, places=4)
+        self.assertAlmostEqual((w.Earth_Moon.getPos(123) - w.Earth.getPos(123)).length(),
+                               0.1 * w.orbitscale, places=4)
+        self.assertEqual(w.orbits.positions([0, year, 2 * year]).shape,
+                         (3, len(w.galaxy_objects), 3))
+
+    def test_launch_window(self):
+        """ Cheapest departure to Mars within one synodic cycle"""
+        w = World(headless=True)
+        cycle = w.launch_windows.synodic_period(w.Earth, w.Mars)
+        departure, dist = w.launch_windows.cheapest_departure(w.Earth, w.Mars, 100, cycle)
+        self.assertAlmostEqual(departure, cycle, delta=1)
+        self.assertAlmostEqual(dist, (w.Earth.getPos(departure) - w.Mars.getPos(departure)).length(),
+                               places=3)
+
+    def test_spatial_queries(self):
+        """ Nearest and radius queries around Earth"""
+        w = World(headless=True)
+        index = w.spatial_index()
+        self.assertEqual(index.nearest(w.Earth, 1), [w.Earth_Moon])
+        self.assertEqual(index.within(w.Earth, 1.5), [w.Earth_Moon])
+        self.assertAlmostEqual(w.calc_distance_between_planets(w.Earth, w.Mars), 5.2, places=4)
+
+        # Distances follow the rendered orbits between two steps
+        w.clock.accumulator = 0.5
+        earth, mars = w.Earth.getPos(), w.Mars.getPos()
+        self.assertAlmostEqual(w.calc_distance_between_planets(w.Earth, w.Mars),
+                               math.hypot(earth.x - mars.x, earth.y - mars.y), places=6)
+
+    def test_catalog_validation(self):
+        """ Reject a buildings DB with missing fields and wrong types"""
+        db = buildingsDB.loadDB()
+        del db['RES']['Coal Drill']['price']
+        db['ENR']['Wind Turbine']['incVal'] = '150'
+        with self.assertRaises(ValueError):
+            buildingsDB.validate(db)
+
+    def test_catalog_cache(self):
+        """ Load the catalog from its cache, but never run code from a cache file"""
+        cache = 'test_catalog.cache'
+        with open('test_marker', 'w'):
+            pass
+
+        class Payload():
+            def __reduce__(self):
+                return (os.remove, ('test_marker',))
+
+        with open(cache, 'wb') as f:
+            pickle.dump(Payload(), f)
+        compiled = load_catalog(cache_path=cache)
+        self.assertTrue(os.path.exists('test_marker'))
+        os.remove('test_marker')
+
+        cached = load_catalog(cache_path=cache)
+        os.remove(cache)
+        self.assertEqual(cached.columns['name'], compiled.columns['name'])
+        self.assertEqual(cached.columns['price'].tolist(), compiled.columns['price'].tolist())
+        self.assertEqual([bp.name for bp in cached.producing('Iron ingots')], ['Iron Mine'])
+
+    def test_production_plan(self):
+        """ Buildings Earth needs for 20 Weapons per tick"""
+        w = World(headless=True)
+        plan = w.production.solve(w.Earth, {'Weapons': 20})
+        self.assertEqual(dict(plan.buildings), {'Weapon Forge': 2, 'Iron Mine': 2})
+        self.assertEqual(plan.energy, 800)
+        self.assertIs(w.production.solve(w.Earth, {'Weapons': 20}), plan)
+        self.assertFalse(w.production.solve(w.Mars, {'Vegetable crates': 10}).feasible)
+
+    def test_ledger_consistency(self):
+        """ Keep the ledger in sync while building, producing and salvaging"""
+        w = World(headless=True, seed=5)
+        w.check_ledger = True
+        w.execute('construct', 'Earth', 'ENR', '1', 'Wind Turbine')
+        w.execute('construct', 'Earth', 'RES', '1', 'Coal Drill')
+        w.execute('construct', 'Earth', 'ENR', '2', 'Coal Generator')
+        w.simulate(days=2)
+        w.execute('salvage', 'Earth', 'RES', '1')
+        w.simulate(days=2)
+        self.assertEqual(w.system_population, w.Earth.population)
+        self.assertEqual(w.ledger.goods_total('Coal sacks'), w.Earth.goods['Coal sacks'])
+
+    def test_mission_scheduler(self):
+        """ Run two missions at once, cancel one and save the other"""
+        path = 'test_missions.noc'
+        w = World(headless=True, seed=8)
+        w.money += 10000
+        w.execute('mission', 'probe', 'Venus', 30, 500)
+        w.execute('mission', 'probe', 'Venus', 50, 500)
+        first, second = list(w.missions)
+        for _ in range(10):
+            w.step()
+        self.assertEqual(w.Venus.messages[first.message_id]['value'], 20)
+        w.execute('cancel_mission', second.id)
+        self.assertNotIn(second.message_id, w.Venus.messages)
+
+        w.save_game(path)
+        loaded = World(headless=True)
+        loaded.load_game(path)
+        os.remove(path)
+        self.assertEqual(loaded.Venus.messages[first.message_id]['value'], 20)
+        for _ in range(21):
+            loaded.step()
+        self.assertTrue(loaded.Venus.probed)
+        self.assertEqual(len(loaded.missions), 0)
+
+    def test_game_clock(self):
+        """ Batch steps and run timers in game time"""
+        w = World(headless=True)
+        fired = []
+        w.clock.every(10, lambda: fired.append(w.sim_time))
+        w.clock.after(15, lambda: fired.append('once'))
+        w.advance(30)
+        self.assertEqual(w.sim_time, 30)
+        self.assertEqual(fired, [10, 'once', 20, 30])
+        w.clock.toggle_pause()
+        w.clock.set_speed(16)
+        self.assertFalse(w.clock.paused)
+        self.assertEqual(w.clock.time, 30)
+
+    def test_threaded_simulation(self):
+        """ Run steps in the worker thread and read them from the snapshot"""
+        w = World(headless=True)
+        w.clock.start(threaded=True)
+        state = w.clock.snapshot
+        self.assertIs(w.clock.snapshot, state)
+        w.execute('construct', 'Earth', 'ENR', '1', 'Wind Turbine')
+        self.assertIsNot(w.clock.snapshot, state)
+        self.assertEqual(w.clock.snapshot.bodies['Earth'].energy_cap, w.Earth.energy_cap)
+        w.clock.accumulator = 10
+        taskMgr.step()
+        taskMgr.remove('gameClockTask')
+        deadline = time.time() + 10
+        while w.clock.queued and time.time() < deadline:
+            time.sleep(0.01)
+        state = w.clock.snapshot
+        self.assertGreaterEqual(state.sim_time, 10)
+        self.assertEqual(state.sim_time, w.sim_time)
+        self.assertEqual(state.money, w.money)
+        with self.assertRaises(TypeError):
+            state.bodies['Earth'] = None
+
+    def test_build_view_events(self):
+        """ Only changes of the shown planet section reach the build view"""
+        w = self.w
+        view = w.NewPlanetBuildView
+        w.toggle_planet_info_mode(True, w.Mars)
+        w.NewPlanetInfoView.toggle_planet_build_mode(True)
+        view.switch_build_section('PRO', view.PlanetBuildPROButton)
+        updated = []
+        view.update_slot = updated.append
+        try:
+            messenger.send(w.economy.change_event(w.Mars, 'PRO'), ['1'])
+            messenger.send(w.economy.change_event(w.Mars, 'ENR'), ['2'])
+            messenger.send(w.economy.change_event(w.Earth, 'PRO'), ['3'])
+            self.assertEqual(updated, ['1'])
+
+            view.hide()
+            messenger.send(w.economy.change_event(w.Mars, 'PRO'), ['4'])
+            self.assertEqual(updated, ['1'])
+        finally:
+            del view.update_slot
+            w.NewPlanetInfoView.toggle_planet_build_mode(False)
+            w.toggle_planet_info_mode(False)
+
+    def test_build_view_reads_snapshot(self):
+        """ The build view only shows slots of published snapshots"""
+        w = self.w
+        view = w.NewPlanetBuildView
+        label = view.PlanetBuildSlotLabels[1]
+        w.money += 1000
+        w.toggle_planet_info_mode(True, w.Venus)
+        w.NewPlanetInfoView.toggle_planet_build_mode(True)
+        view.switch_build_section('ENR', view.PlanetBuildENRButton)
+        self.assertIsNone(w.execute('construct', 'Venus', 'ENR', '2', 'Wind Turbine'))
+        view.update_slots()
+        self.assertEqual(label['text'], 'Wind Turbine')
+
+        w.economy.salvage_building(w.Venus, 'ENR', '2')
+        view.update_slots()
+        self.assertEqual(label['text'], 'Wind Turbine')
+        w.clock.publish()
+        view.update_slots()
+        self.assertEqual(label['text'], '')
+
+        # Events of the frame's thread arrive after the next publish
+        received = []
+        w.accept('testClockEvent', received.append)
+        w.clock.send('testClockEvent', ['2'])
+        self.assertEqual(received, [])
+        taskMgr.step()
+        self.assertEqual(received, ['2'])
+        w.ignore('testClockEvent')
+        w.NewPlanetInfoView.toggle_planet_build_mode(False)
+        w.toggle_planet_info_mode(False)
+
+    def test_virtual_rows(self):
+        """ Recycle a bounded set of rows while scrolling through a long list"""
+        selector = ScrolledItemSelector(virtual=True)
+        for n in range(200):
+            selector.add_item(title='Item {}'.format(n), text=str(n), value=n)
+        selector.set_active_item(0)
+        rows = len(selector.bound_rows) + len(selector.row_pool)
+        row_height = selector.i_y + selector.item_v_padding
+        self.assertLess(rows, 20)
+
+        for z in (50 * row_height, 150 * row_height, 0):
+            selector.canvas.setZ(z)
+            selector._bind_rows()
+            self.assertEqual(len(selector.bound_rows) + len(selector.row_pool), rows)
+            for index, row in selector.bound_rows.items():
+                self.assertEqual(row.title['text'], 'Item {}'.format(index))
+            if z:
+                self.assertIsNone(selector.get_active_item())
+
+        self.assertIs(selector.get_active_item(), selector.bound_rows[0])
+        self.assertEqual(selector.get_active_item()['frameColor'], selector.item_background_active)
+        self.assertEqual(selector.get_active_value(), 0)
+        selector.frame.destroy()
+
+    def test_text_bindings(self):
+        """ Only set the text of a bound label when its values change"""
+        scheduler = FrameScheduler()
+        bindings = Bindings(scheduler, 'testBindings')
+        label = DirectLabel(text='')
+        value = [1]
+        bindings.bind(label, lambda: (value[0],), 'Value {}'.format)
+        self.assertEqual(label['text'], 'Value 1')
+        self.assertTrue(scheduler.has('testBindings'))
+
+        texts = []
+        text = label.component('text0')
+        text.setText = lambda value, set_text=text.setText: (texts.append(value), set_text(value))
+        bindings.refresh()
+        self.assertEqual(texts, [])
+        value[0] = 2
+        bindings.refresh()
+        self.assertEqual(texts, ['Value 2'])
+
+        bindings.clear()
+        self.assertFalse(scheduler.has('testBindings'))
+        label.destroy()
+
+    def test_frame_scheduler(self):
+        """ Stagger jobs of the same interval and defer what exceeds the budget"""
+        scheduler = FrameScheduler(budget=0)
+        ran = []
+        for i in range(4):
+            scheduler.every(1, lambda i=i: ran.append(i), 'job{}'.format(i), priority=3 - i)
+        now = globalClock.getFrameTime()
+        phases = sorted(round(job.due - now, 6) for job in scheduler.jobs.values())
+        self.assertEqual(phases, [0.125, 0.25, 0.5, 0.75])
+
+        for job in scheduler.jobs.values():
+            job.due = now
+        scheduler.start()
+        taskMgr.step()
+        taskMgr.step()
+        taskMgr.remove('frameSchedulerTask')
+        self.assertEqual(ran, [3, 2])
+        self.assertEqual(scheduler.deferred, 5)
+
+    def test_task_profiler(self):
+        """ Time a task and export the report as JSON and CSV"""
+        # A task manager of its own, so no task of the shared world runs
+        manager = TaskManager()
+        manager.mgr = AsyncTaskManager('profilerTest')
+        profiler = Profiler()
+        profiler.install(manager)
+        manager.add(lambda task: task.cont, 'orbitTask')
+        for _ in range(5):
+            manager.step()
+        manager.remove('orbitTask')
+        profiler.uninstall()
+        self.assertIs(getattr(taskMgr, 'profiler', None), self.w.profiler)
+        profiler.record('quickinfo', 0.002)
+
+        report = profiler.report()
+        tasks = {task['name']: task for task in report['tasks']}
+        self.assertEqual(tasks['orbitTask']['count'], 5)
+        self.assertEqual(tasks['orbitTask']['category'], 'render')
+        self.assertAlmostEqual(tasks['quickinfo']['p95_ms'], 2)
+        self.assertEqual({category['name'] for category in report['categories']}, {'render', 'gui'})
+
+        profiler.export_json('test_profile.json')
+        profiler.export_csv('test_profile.csv')
+        with open('test_profile.json') as f:
+            self.assertEqual(json.load(f), report)
+        with open('test_profile.csv') as f:
+            self.assertEqual(len(f.readlines()), 1 + 2 + 2)
+        os.remove('test_profile.json')
+        os.remove('test_profile.csv')
+
+    def test_missing_texture_keeps_streaming(self):
+        """ A texture that fails to load is logged and streaming goes on"""
+        assets = AssetRegistry()
+        loaded = []
+        assets.request_texture('models/missing_texture.jpg', callback=loaded.append)
+        assets.request_texture('models/earth_1k_tex.jpg', callback=loaded.append, priority=1)
+        task = PythonTask(assets.stream_task)
+        while assets.queue:
+            assets.stream_task(task)
+        self.assertEqual(assets.progress(), 1)
+        self.assertEqual(assets.failed, [('texture', 'models/missing_texture.jpg')])
+        self.assertEqual(len(loaded), 1)
+
+    def test_construct_on_occupied_slot(self):
+        """ Refuse to build into a slot that already holds a building"""
+        w = World(headless=True)
+        w.money += 10000
+        self.assertIsNone(w.execute('construct', 'Earth', 'ENR', '1', 'Wind Turbine'))
+        money, energy_cap = w.money, w.Earth.energy_cap
+        self.assertEqual(w.execute('construct', 'Earth', 'ENR', '1', 'Coal Generator'),
+                         'Slot is occupied')
+        self.assertEqual((w.money, w.Earth.energy_cap), (money, energy_cap))
+        self.assertEqual(w.Earth.slots['ENR']['1']['name'], 'Wind Turbine')
+        self.assertEqual(int(w.economy.b_alive.sum()), 1)
+
+    def test_salvage_empty_slot(self):
+        """ Refuse to salvage a slot without a building"""
+        w = World(headless=True)
+        money = w.money
+        self.assertEqual(w.execute('salvage', 'Earth', 'ENR', '1'), 'Slot is empty')
+        self.assertEqual(w.execute('salvage', 'Earth', 'XYZ', '1'), 'No such slot')
+        self.assertEqual(w.money, money)
+
+    def test_only_power_plants_change_energy(self):
+        """ A consumer outside ENR losing its supply keeps the energy capacity"""
+        w = World(headless=True)
+        w.money += 10000
+        w.execute('construct', 'Earth', 'ENR', '1', 'Coal Generator')
+        w.economy.add_consumer(w.Earth, 'DEV', '1', 'Trading Center', 'Coal sacks', 5, 300)
+        cap = w.Earth.energy_cap
+        w.economy.tick()
+        self.assertEqual(w.Earth.energy_cap, cap - 500)
+        w.ledger.check()
+
+    def test_unsupplied_building_leaves_stock(self):
+        """ A processor that can not be supplied does not starve the next one"""
+        w = World(headless=True)
+        w.Earth.goods['Iron ingots'] = 20
+        yard = w.economy.add_processor(w.Earth, 'PRO', '1', 'Ship Yard', 'Iron ingots', 'Ships', 10, 30)
+        forge = w.economy.add_processor(w.Earth, 'PRO', '2', 'Weapon Forge', 'Iron ingots', 'Weapons', 10, 10)
+        w.economy.tick()
+        self.assertEqual(yard['problemText'], 'Missing Iron ingots to continue production')
+        self.assertFalse(forge['gotProblem'])
+        self.assertEqual(w.Earth.goods['Iron ingots'], 10)
+        self.assertEqual(w.Earth.goods['Weapons'], 10)
+        self.assertEqual(w.Earth.goods['Ships'], 0)
+        w.ledger.check()
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=3)